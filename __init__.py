@@ -1,8 +1,12 @@
+from .fft_backend import *
+from .cqt_basis_cache import *
 from .cqt_timepoint_analyzer import *
 from .cqt_analyzer import *
 from .sub_bin_spec_analyzer import *
 from .spectrogram import *
+from .streaming_spectrogram import *
 from .wav_read import *
+from .wav_memmap_read import *
 from .wav_fmt import *
 try:
     from .wav_play import *
@@ -11,6 +15,7 @@ except ModuleNotFoundError:
     # making it optional here as it contains a PyAudio and hence portaudio dependency, which is a nuisance. I should add
     # proper logging here rather than just a print statement.
     print("WARNING: WavPlay is not imported, don't you try to use it.")
+from .decode_cache import *
 from .mp3_read import *
 from .make_audio_reader import *
 from . import func_lib
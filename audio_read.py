@@ -4,6 +4,9 @@ Created 04-11-18 by Matthew C. McCallum
 
 
 from abc import ABC, abstractmethod
+import asyncio
+
+import numpy as np
 
 
 class AudioRead(ABC):
@@ -12,15 +15,43 @@ class AudioRead(ABC):
     """
 
     @abstractmethod
-    def ReadSamplesFloat(self):
+    def ReadSamplesFloat(self, start_seconds=0.0, duration=None, dtype=np.float64):
         """
-        Reads all samples from the wav file as floats in the range -1.0 <= sample <= 1.0.
+        Reads samples from the wav file as floats in the range -1.0 <= sample <= 1.0.
+
+        Args:
+            start_seconds -> float - The time in seconds of the first sample to read.
+
+            duration -> float - The number of seconds of audio to read. If None, all samples up until the end of the
+            file are read.
+
+            dtype -> np.dtype - The floating point type of the returned samples, e.g., np.float32 to halve memory use.
 
         Return:
             numpy.ndarray - An array of dimensions (num_channels, num_frames) containing float valued audio samples.
         """
         pass
 
+    async def ReadSamplesFloatAsync(self, start_seconds=0.0, duration=None, dtype=np.float64):
+        """
+        Reads samples as floats, as in ReadSamplesFloat(...), without blocking the asyncio event loop. By default
+        this runs ReadSamplesFloat(...) in the event loop's default executor. Readers that decode in subprocesses
+        override this to await the subprocess directly.
+
+        Args:
+            start_seconds -> float - The time in seconds of the first sample to read.
+
+            duration -> float - The number of seconds of audio to read. If None, all samples up until the end of the
+            file are read.
+
+            dtype -> np.dtype - The floating point type of the returned samples, e.g., np.float32 to halve memory use.
+
+        Return:
+            numpy.ndarray - An array of dimensions (num_channels, num_frames) containing float valued audio samples.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self.ReadSamplesFloat, start_seconds, duration, dtype)
+
     @abstractmethod
     def ReadSamplesInterleavedInt(self):
         """
@@ -31,6 +62,134 @@ class AudioRead(ABC):
         """
         pass
 
+    @abstractmethod
+    def ReadSamplesInt(self, start_seconds=0.0, duration=None):
+        """
+        Reads samples from file as integers, without any conversion from the underlying PCM data.
+
+        Args:
+            start_seconds -> float - The time in seconds of the first sample to read.
+
+            duration -> float - The number of seconds of audio to read. If None, all samples up until the end of the
+            file are read.
+
+        Return:
+            numpy.ndarray - An array of dimensions (num_channels, num_frames) containing integer valued audio samples.
+        """
+        pass
+
+    @abstractmethod
+    def StreamBlocks(self, block_frames, overlap_frames=0, dtype=np.float64):
+        """
+        A generator that reads the audio sequentially in blocks of float samples, so that long files may be processed
+        with bounded memory.
+
+        Args:
+            block_frames -> int - The number of frames in each block.
+
+            overlap_frames -> int - The number of frames shared between the end of each block and the start of the
+            next. Must be less than block_frames.
+
+            dtype -> np.dtype - The floating point type of the yielded blocks.
+
+        Return:
+            numpy.ndarray - Yields arrays of dimensions (num_channels, block_frames) containing float valued audio
+            samples, each starting block_frames - overlap_frames after the last. The final block may be shorter.
+            Note: the same buffer is reused for every block, so copy anything that is needed beyond the next
+            iteration.
+        """
+        pass
+
+    def _StreamBlocks(self, read_frames, block_frames, overlap_frames, dtype):
+        """
+        Produces overlapping blocks of float samples from a sequential source of integer samples, converting each
+        frame only once into a single preallocated block buffer.
+
+        Args:
+            read_frames -> callable - A function taking a number of frames, that returns the next, at most that
+            many, frames from the source as a (num_channels, num_frames) integer array. An empty array signals the
+            end of the audio.
+
+            block_frames -> int - The number of frames in each block.
+
+            overlap_frames -> int - The number of frames shared between consecutive blocks.
+
+            dtype -> np.dtype - The floating point type of the block buffer.
+
+        Return:
+            numpy.ndarray - Yields (num_channels, num_frames) views on the block buffer.
+        """
+        if block_frames <= 0 or not 0 <= overlap_frames < block_frames:
+            raise ValueError('Block length must be positive and greater than the overlap length.')
+        hop_frames = block_frames - overlap_frames
+        block = np.empty((self.fmt.n_channels, block_frames), dtype=dtype)
+
+        frames = read_frames(block_frames)
+        num_frames = frames.shape[1]
+        if not num_frames:
+            return
+        self.fmt.IntToFloat(frames, out=block[:, :num_frames])
+        yield block[:, :num_frames]
+
+        while num_frames == block_frames:
+            # Carry the overlapping frames over to the start of the buffer, and only read the new frames.
+            block[:, :overlap_frames] = block[:, hop_frames:]
+            frames = read_frames(hop_frames)
+            if not frames.shape[1]:
+                return
+            num_frames = overlap_frames + frames.shape[1]
+            self.fmt.IntToFloat(frames, out=block[:, overlap_frames:num_frames])
+            yield block[:, :num_frames]
+
+    def _StreamArray(self, samples, block_frames, overlap_frames, dtype):
+        """
+        Produces overlapping blocks of float samples from integer samples that are already available as an array, e.g.,
+        in memory or memory mapped.
+
+        Args:
+            samples -> numpy.ndarray - A (num_channels, num_frames) array of integer samples.
+
+            block_frames -> int - The number of frames in each block.
+
+            overlap_frames -> int - The number of frames shared between consecutive blocks.
+
+            dtype -> np.dtype - The floating point type of the block buffer.
+
+        Return:
+            numpy.ndarray - Yields (num_channels, num_frames) views on the block buffer.
+        """
+        position = 0
+
+        def read_frames(num_frames):
+            nonlocal position
+            frames = samples[:, position:(position + num_frames)]
+            position += frames.shape[1]
+            return frames
+
+        yield from self._StreamBlocks(read_frames, block_frames, overlap_frames, dtype)
+
+    def _FrameRange(self, start_seconds, duration, num_frames):
+        """
+        Converts a time range in seconds into a range of frame indices, clipped to the extent of the audio.
+
+        Args:
+            start_seconds -> float - The time in seconds of the first frame in the range.
+
+            duration -> float - The length of the range in seconds. If None, the range extends to the end of the audio.
+
+            num_frames -> int - The total number of frames in the audio.
+
+        Return:
+            int - The index of the first frame in the range.
+
+            int - One past the index of the last frame in the range.
+        """
+        start_frame = min(max(int(round(start_seconds*self.fmt.samp_rate)), 0), num_frames)
+        if duration is None:
+            return start_frame, num_frames
+        end_frame = min(start_frame + int(round(duration*self.fmt.samp_rate)), num_frames)
+        return start_frame, end_frame
+
     @property
     @abstractmethod
     def data(self):
@@ -3,12 +3,16 @@ Created 06-14-18 by Matt C. McCallum
 """
 
 # Local imports
-# None.
+from .fft_backend import GetFFTBackend
+from .cqt_basis_cache import CQTBasisCache
+from .cqt_basis_cache import GetCQTBasisCache
 
 # Third party imports
 from .librosa_cqt_scipy_resample import cqt
 from .librosa_cqt_scipy_resample import hybrid_cqt
 from .librosa_cqt_scipy_resample import pseudo_cqt
+from .librosa_cqt_scipy_resample import cqt_stream
+from .librosa_cqt_scipy_resample import cqt_context
 import numpy as np
 
 # Python standard library imports
@@ -25,7 +29,8 @@ class CQTAnalyzer(object):
     PSEUDO_CQT_TYPE = 'pseudo'
     ACTUAL_CQT_TYPE = 'cqt'
 
-    def __init__(self, samples_per_octave, octaves, min_freq, hop, filter_scale=1.0, samp_rate=44100, cqt_type=ACTUAL_CQT_TYPE, norm=1):
+    def __init__(self, samples_per_octave, octaves, min_freq, hop, filter_scale=1.0, samp_rate=44100, cqt_type=ACTUAL_CQT_TYPE, norm=1,
+                 dtype=None, fft_backend=None, basis_cache=None, n_jobs=1):
         """
         Constructor.
 
@@ -45,6 +50,20 @@ class CQTAnalyzer(object):
             should be reconfigured for each audio sample if necessary.
 
             cqt_type: string - Whether to perform the CQT or PsuedoCQT (i.e., with or without adaptive windowing length in time, across frequency.) or HybridCQT.
+
+            dtype: np.dtype - The floating point precision of analysis, e.g., np.float32 to use single precision for the
+            signal, STFT and filter basis throughout. If None, the precisions of the librosa CQT implementation are
+            kept, i.e., a single precision STFT projected onto a double precision filter basis.
+
+            fft_backend: FFTBackend or str - The FFT backend computing the STFT and filter basis, see fft_backend.py.
+            If None, the global backend is used.
+
+            basis_cache: CQTBasisCache - The cache the CQT filter bases are shared through, see cqt_basis_cache.py. If
+            None, the cache shared by every analyzer in this process is used. The analyzer also holds every basis it
+            has used itself, so that they are only built or looked up once for the life of the analyzer.
+
+            n_jobs: int - The number of threads computing the octaves of the CQT and hybrid CQT concurrently, as each
+            is resampled from the one above it, or -1 to use every CPU.
         """
         self._hop = hop
         self._min_freq = min_freq
@@ -54,6 +73,11 @@ class CQTAnalyzer(object):
         self._type = cqt_type
         self._filt_scale = filter_scale
         self._norm = norm
+        self._dtype = None if dtype is None else np.dtype(dtype)
+        self._fft_backend = None if fft_backend is None else GetFFTBackend(fft_backend)
+        self._basis_cache = GetCQTBasisCache(basis_cache)
+        self._held_bases = CQTBasisCache(max_entries=None, parent=self._basis_cache)
+        self._n_jobs = n_jobs
 
     def Analyze(self, audio_sig, start_idx, num_windows=None, truncate_audio=False):
         """
@@ -61,22 +85,31 @@ class CQTAnalyzer(object):
         go to the end of the signal, but output a fixed number of analysis windows following the requested index.
 
         Args:
-            audio_sig: np.ndarray(float) - A 1D numpy array of floats, each representing an individual sample.
+            audio_sig: np.ndarray(float) - A 1D numpy array of floats, each representing an individual sample, or a 2D
+            array of dimensions (num_clips, num_samples), to analyze a batch of equal length clips at once.
 
             start_idx: int - The index of the first window to return. A block of _num_windows will be returned
             following this first window. The window at index 0 is centered at sample 0 in audio_sig. All remaining
             windows are centered at audiosig[idx*self._hop].
 
             num_windows: int - The number of windows to analyze from the provided starting index with the configured
-            hop number of samples in between each.
+            hop number of samples in between each. Only the samples these windows depend on are analyzed, see context,
+            and the windows are identical to those of analyzing the whole signal. Fewer windows are returned if the
+            signal ends first. If None, the whole signal is analyzed.
+
+        Return:
+            np.ndarray - The magnitude CQT, of dimensions (num_bins, num_windows), or (num_clips, num_bins, num_windows)
+            for a batch of clips.
         """
         if num_windows != None:
-            audio_sig = audio_sig[int(start_idx*self.hop):int(start_idx*self.hop + self.hop*num_windows)] 
+            # Analyze from a whole number of hops before the first window, so that every octave is sampled and framed
+            # at the same points as for the whole signal.
+            context = self.context
+            first_hop = max(start_idx - (context + self.hop - 1)//self.hop, 0)
+            audio_sig = audio_sig[..., first_hop*self.hop:(start_idx + num_windows - 1)*self.hop + context + 1]
 
-        # TODO [matt.c.mccallum 08.21.18]: Here we make sure the number of samples is not close to a prime number to avoid problems
-        # resampling with scipy.
-        if(len(audio_sig)%4):
-            audio_sig = np.concatenate((audio_sig, [0.0]*(4-(len(audio_sig)%4))))
+        if self._dtype is not None:
+            audio_sig = np.asarray(audio_sig, dtype=self._dtype)
 
         if self._type == self.PSEUDO_CQT_TYPE:
             result = np.abs(pseudo_cqt(audio_sig, 
@@ -87,7 +120,10 @@ class CQTAnalyzer(object):
                         self._samples_per_octave,
                         norm=self._norm,
                         tuning=0.0,
-                        filter_scale=self._filt_scale))
+                        filter_scale=self._filt_scale,
+                        dtype=self._complex_dtype,
+                        fft_backend=self._fft_backend,
+                        basis_cache=self._held_bases))
         elif self._type == self.HYRBID_CQT_TYPE:
             result = np.abs(hybrid_cqt(audio_sig, 
                         self.samp_rate, 
@@ -97,7 +133,11 @@ class CQTAnalyzer(object):
                         self._samples_per_octave,
                         norm=self._norm,
                         tuning=0.0,
-                        filter_scale=self._filt_scale))
+                        filter_scale=self._filt_scale,
+                        dtype=self._complex_dtype,
+                        fft_backend=self._fft_backend,
+                        basis_cache=self._held_bases,
+                        n_jobs=self._n_jobs))
         else:
             result = np.abs(cqt(audio_sig, 
                         self.samp_rate, 
@@ -107,13 +147,84 @@ class CQTAnalyzer(object):
                         self._samples_per_octave,
                         norm=self._norm,
                         tuning=0.0,
-                        filter_scale=self._filt_scale))
+                        filter_scale=self._filt_scale,
+                        dtype=self._complex_dtype,
+                        fft_backend=self._fft_backend,
+                        basis_cache=self._held_bases,
+                        n_jobs=self._n_jobs))
 
         if num_windows != None:
-            result = result[:, :num_windows]
+            result = result[..., (start_idx - first_hop):(start_idx - first_hop + num_windows)]
         
         return result
 
+    def AnalyzeStream(self, blocks):
+        """
+        Analyzes a signal arriving as successive blocks, e.g., a recording too long to hold in memory, or live audio,
+        yielding CQT windows as soon as they are complete. Only the samples still needed by the longest filter are kept
+        between blocks, for each octave of the recursive CQT. The concatenated output matches analyzing the whole signal
+        at once with the ACTUAL_CQT_TYPE.
+
+        Args:
+            blocks: iterable(np.ndarray(float)) - Consecutive 1D blocks of samples of any length, e.g., the mono
+            blocks of an audio reader's StreamBlocks(...) with no overlap.
+
+        Return:
+            generator(np.ndarray) - Yields the magnitude CQT of the next windows, of dimensions (num_bins, num_windows),
+            whenever a block completes any.
+        """
+        if self._type != self.ACTUAL_CQT_TYPE:
+            raise ValueError('Streaming analysis is only supported for the {0} CQT type.'.format(self.ACTUAL_CQT_TYPE))
+
+        for result in cqt_stream(blocks,
+                                 self.samp_rate,
+                                 self.hop,
+                                 self._min_freq,
+                                 self._octaves*self._samples_per_octave,
+                                 self._samples_per_octave,
+                                 norm=self._norm,
+                                 tuning=0.0,
+                                 filter_scale=self._filt_scale,
+                                 dtype=self._complex_dtype,
+                                 fft_backend=self._fft_backend,
+                                 basis_cache=self._held_bases):
+            yield np.abs(result)
+
+    @property
+    def _complex_dtype(self):
+        """
+        Type: np.dtype
+
+        The complex type of the CQT for the configured precision, or None to use the librosa defaults.
+        """
+        if self._dtype is None:
+            return None
+        return np.result_type(self._dtype, np.complex64)
+
+    @property
+    def basis_cache(self):
+        """
+        Type: CQTBasisCache
+
+        The cache the CQT filter bases are shared through, e.g., for its hit and miss statistics.
+        """
+        return self._basis_cache
+
+    @property
+    def context(self):
+        """
+        Type: int
+
+        The number of samples either side of the center of a CQT analysis window that the window depends on.
+        """
+        return cqt_context(self.samp_rate,
+                           self.hop,
+                           self._min_freq,
+                           self._octaves*self._samples_per_octave,
+                           self._samples_per_octave,
+                           tuning=0.0,
+                           filter_scale=self._filt_scale)
+
     @property
     def analysis_frequencies(self):
         """
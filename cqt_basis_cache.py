@@ -0,0 +1,135 @@
+"""
+Created 10-17-26 by Matthew C. McCallum
+"""
+
+# Local modules
+# None.
+
+# Local submodules
+# None.
+
+# Thirdparty modules
+# None.
+
+# Python library imports
+import collections
+import threading
+
+
+class CQTBasisCache(object):
+    """
+    An in-process cache of the sparse FFT filter bases of the constant-Q transform, keyed by the parameters each basis
+    is built from, so that analyses with the same parameters, e.g., every CQTAnalyzer with the same configuration,
+    build each basis only once. The number of bases held is optionally capped, with the least recently used bases
+    evicted first. A cache may have a parent cache that it looks up bases in before building them, e.g., so that an
+    analyzer may hold its own bases while sharing them with other analyzers.
+
+    Cached bases are shared, and must not be modified by their users.
+    """
+
+    MAX_ENTRIES = 64
+
+    def __init__(self, max_entries=MAX_ENTRIES, parent=None):
+        """
+        Constructor.
+
+        Args:
+            max_entries -> int - The maximum number of bases held, or None to hold every basis looked up.
+
+            parent -> CQTBasisCache - An optional cache to look up bases in when they are not in this one.
+        """
+        self._max_entries = max_entries
+        self._parent = parent
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def Get(self, key, make):
+        """
+        Looks up a basis in the cache, marking it as recently used, or builds and caches it if it is not there.
+
+        Args:
+            key -> tuple - The hashable parameters the basis is built from.
+
+            make -> callable - A function of no arguments that builds the basis.
+
+        Return:
+            object - The cached basis.
+        """
+        with self._lock:
+            if key in self._entries:
+                self._hits += 1
+                self._entries.move_to_end(key)
+                return self._entries[key]
+            self._misses += 1
+
+        # Build outside of the lock, so that other bases may be looked up in the meantime.
+        value = make() if self._parent is None else self._parent.Get(key, make)
+
+        with self._lock:
+            self._entries[key] = value
+            if self._max_entries is not None:
+                while len(self._entries) > self._max_entries:
+                    self._entries.popitem(last=False)
+                    self._evictions += 1
+        return value
+
+    def Clear(self):
+        """
+        Removes every basis from the cache, keeping its statistics.
+        """
+        with self._lock:
+            self._entries.clear()
+
+    @property
+    def hits(self):
+        """
+        int - The number of lookups that found the basis in this cache.
+        """
+        return self._hits
+
+    @property
+    def misses(self):
+        """
+        int - The number of lookups that did not find the basis in this cache.
+        """
+        return self._misses
+
+    @property
+    def evictions(self):
+        """
+        int - The number of bases evicted to keep within max_entries.
+        """
+        return self._evictions
+
+    @property
+    def num_entries(self):
+        """
+        int - The number of bases currently held.
+        """
+        return len(self._entries)
+
+    @property
+    def max_entries(self):
+        """
+        int - The maximum number of bases held, or None if unbounded.
+        """
+        return self._max_entries
+
+
+_shared_basis_cache = CQTBasisCache()
+
+
+def GetCQTBasisCache(basis_cache=None):
+    """
+    Resolves the basis cache to use for an analysis.
+
+    Args:
+        basis_cache -> CQTBasisCache - A cache, or None for the cache shared by every analyzer in this process.
+
+    Return:
+        CQTBasisCache - The cache.
+    """
+    return _shared_basis_cache if basis_cache is None else basis_cache
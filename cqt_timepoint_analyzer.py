@@ -1,8 +1,10 @@
 
 
+# Local imports
+from .fft_backend import *
+
 # Third party imports
 import librosa.filters
-import scipy.fftpack as fft
 import numpy as np
 
 
@@ -11,7 +13,10 @@ class CQTTimepointAnalyzer( object ):
     Analyzes the pseudo CQT of a signal at arbitrary time points.
     """
 
-    def __init__(self, samp_rate, samples_per_octave, octaves, min_freq):
+    # The number of windows transformed at once, bounding the memory used for any number of time points.
+    BLOCK_WINDOWS = 256
+
+    def __init__(self, samp_rate, samples_per_octave, octaves, min_freq, dtype=np.float64, fft_backend=None):
         """
         Constructor.
 
@@ -24,11 +29,19 @@ class CQTTimepointAnalyzer( object ):
 
             min_freq: float - Minimum frequency analyzed in the CQT in Hz.
 
+            dtype: np.dtype - The floating point precision of analysis, e.g., np.float32 to halve the memory and
+            roughly double the throughput of the FFT and basis projection.
+
+            fft_backend: FFTBackend or str - The FFT backend to use, see fft_backend.py. If None, the global backend is
+            used.
+
         """
         self._samples_per_octave = samples_per_octave
         self._octaves = octaves
         self._samp_rate = samp_rate
         self._fmin = min_freq
+        self._dtype = np.dtype(dtype)
+        self._fft_backend = None if fft_backend is None else GetFFTBackend(fft_backend)
         self._sparsity = 0.05  # percentage of energy that can be discarded from each filter kernel
         self._window_size = 0
         self._n_fft = 0
@@ -45,6 +58,7 @@ class CQTTimepointAnalyzer( object ):
             - self._sparsity
             - self._octaves
             - self._samples_per_octave
+            - self._dtype
 
         """
         # Create time domain basis for cqt
@@ -58,13 +72,22 @@ class CQTTimepointAnalyzer( object ):
         # re-normalize bases with respect to the FFT window length
         basis *= basis_lengths[:, np.newaxis] / float(self._n_fft)
         # FFT and retain only the non-negative frequencies
-        self._basis = fft.fft(basis, n=self._n_fft, axis=1)[:, :(self._n_fft // 2) + 1]
+        self._basis = GetFFTBackend(self._fft_backend).Fft(basis, n=self._n_fft, axis=1)[:, :(self._n_fft // 2) + 1]
         # sparsify the basis
         self._basis = librosa.util.sparsify_rows(self._basis, quantile=self._sparsity)
+        self._basis = self._basis.astype(np.result_type(self._dtype, np.complex64))
         # Get filter lengths for normalization
         self._filt_lengths = librosa.filters.constant_q_lengths(self._samp_rate,
                                                                 self._fmin,
                                                                 n_bins=self._octaves*self._samples_per_octave)
+        self._filt_lengths = self._filt_lengths.astype(self._dtype)
+
+    @property
+    def dtype(self):
+        """
+        np.dtype - The floating point precision of analysis.
+        """
+        return self._dtype
 
     @property
     def samp_rate(self):
@@ -84,24 +107,48 @@ class CQTTimepointAnalyzer( object ):
         Args:
             signal: np.ndarray(float) - A 1D array containing the time-domain signal starting at time 0 seconds.
 
-            time_points: np.ndarray(float) - A 1D array containg the times in seconds at which to obtain CQTs.
+            time_points: np.ndarray(float) - A 1D array containg the times in seconds at which to obtain CQTs. The
+            signal is taken to be zero beyond its ends, for windows that overlap them.
 
         Return:
             np.ndarray(float) - A pseudo CQT of the signal at the time points provided with pitch along the first
             dimension and time along the second dimension.
 
         """
-        # Note: By padding the signal below, we effectively shift the time of each value in time_points backward by the
-        # length we pad it by. This is exactly what we want, as it will cause the windows to be centered on each
-        # time point.
-        signal = np.pad(signal, pad_width=self._window_size//2, mode='constant', constant_values=0.0)
-        time_inds = [int(point*self._samp_rate) for point in time_points]
-        windows = [signal[start:(start+self._window_size)].reshape((self._window_size,1)) for start in time_inds]
-        windows = np.hstack(windows)
-
-        # Analyze signal
-        spec = fft.fft(windows, n=self._n_fft, axis=0)[:(self._n_fft // 2) + 1, :]
-        cqt = np.abs(self._basis.dot(spec))
+        signal = np.asarray(signal, dtype=self._dtype)
+        num_samples = len(signal)
+        time_points = np.asarray(time_points, dtype=np.float64)
+        starts = np.floor(time_points*self._samp_rate).astype(np.int64) - self._window_size//2
+
+        # A view of every window lying wholly within the signal, from which windows are gathered without padding or
+        # copying the signal. Windows overlapping either end are zero beyond it, and are filled separately.
+        frames = None
+        if num_samples >= self._window_size:
+            frames = np.lib.stride_tricks.as_strided(signal,
+                                                     shape=(num_samples - self._window_size + 1, self._window_size),
+                                                     strides=(signal.strides[0], signal.strides[0]),
+                                                     writeable=False)
+        edges = (starts < 0) | (starts > num_samples - self._window_size)
+
+        backend = GetFFTBackend(self._fft_backend)
+        windows = np.empty((min(len(starts), self.BLOCK_WINDOWS), self._window_size), dtype=self._dtype)
+        cqt = np.empty((self._basis.shape[0], len(starts)), dtype=self._dtype)
+        for begin in range(0, len(starts), self.BLOCK_WINDOWS):
+            end = min(begin + self.BLOCK_WINDOWS, len(starts))
+            block = windows[:(end - begin)]
+            if frames is not None:
+                block[:] = frames[np.clip(starts[begin:end], 0, len(frames) - 1)]
+            for row in np.flatnonzero(edges[begin:end]):
+                start = starts[begin + row]
+                block[row] = 0.0
+                first = min(max(-start, 0), self._window_size)
+                last = max(min(num_samples - start, self._window_size), first)
+                block[row, first:last] = signal[(start + first):(start + last)]
+
+            # Analyze windows
+            spec = backend.Rfft(block, n=self._n_fft, axis=1)
+            cqt[:, begin:end] = np.abs(self._basis.dot(spec.T))
+
         cqt *= np.sqrt(self._filt_lengths[:, np.newaxis] / self._n_fft)
 
         return cqt
@@ -0,0 +1,235 @@
+"""
+Created 10-17-26 by Matthew C. McCallum
+"""
+
+# Local modules
+# None.
+
+# Local submodules
+# None.
+
+# Thirdparty modules
+import numpy as np
+
+# Python library imports
+import tempfile
+import hashlib
+import shutil
+import os
+
+
+class DecodeCache(object):
+    """
+    A persistent on-disk cache of decoded audio, so that compressed files need only be decoded once across many jobs.
+    Entries are keyed by a hash of the compressed file contents along with the decoded audio format, and are stored
+    as plain PCM wav files so that they may be memory mapped directly with WavMemmapRead. The total size of the cache
+    is capped, with the least recently used entries evicted first.
+    """
+
+    FILE_EXT = '.wav'
+    HASH_CHUNK_BYTES = 2**20
+
+    def __init__(self, directory, max_bytes):
+        """
+        Constructor.
+
+        Args:
+            directory -> str - The directory to store cached files in. It is created if it does not exist, and may be
+            shared between processes.
+
+            max_bytes -> int - The maximum total size in bytes of all files in the cache.
+        """
+        self._directory = directory
+        self._max_bytes = max_bytes
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        os.makedirs(self._directory, exist_ok=True)
+
+    @classmethod
+    def ContentHash(cls, file):
+        """
+        Computes a hash of the contents of a file, reading it in chunks.
+
+        Args:
+            file -> str or seekable file - Either a filename or a stream to the file data itself. Streams are rewound
+            afterwards.
+
+        Return:
+            str - A hex digest uniquely identifying the file contents.
+        """
+        digest = hashlib.sha1()
+        if type(file) is str:
+            with open(file, 'rb') as stream:
+                for chunk in iter(lambda: stream.read(cls.HASH_CHUNK_BYTES), b''):
+                    digest.update(chunk)
+        else:
+            for chunk in iter(lambda: file.read(cls.HASH_CHUNK_BYTES), b''):
+                digest.update(chunk)
+            file.seek(0)
+        return digest.hexdigest()
+
+    @staticmethod
+    def Key(content_hash, fmt):
+        """
+        Builds the cache key for a file decoded to a given audio format.
+
+        Args:
+            content_hash -> str - The hash of the compressed file contents, see ContentHash(...).
+
+            fmt -> WavFmt - The format the file is decoded to.
+
+        Return:
+            str - The cache key.
+        """
+        return '{0}_{1}_{2}_{3}{4}'.format(content_hash, fmt.samp_rate, fmt.n_channels, fmt.bit_depth,
+                                          'f' if fmt.is_float else '')
+
+    def Get(self, key, count_miss=True):
+        """
+        Looks up a decoded file in the cache, marking it as recently used if it is there.
+
+        Args:
+            key -> str - The cache key, see Key(...).
+
+            count_miss -> bool - Whether not finding the file counts as a miss. Lookups that will not go on to decode
+            the file into the cache, e.g., before decoding only a window of it, should not count.
+
+        Return:
+            str - The filename of the cached wav file, or None if it is not in the cache.
+        """
+        filename = self._Filename(key)
+        try:
+            os.utime(filename)
+        except FileNotFoundError:
+            if count_miss:
+                self._misses += 1
+            return None
+        self._hits += 1
+        return filename
+
+    def PutFile(self, key, wav_filename):
+        """
+        Adds a decoded wav file to the cache by copying it.
+
+        Args:
+            key -> str - The cache key, see Key(...).
+
+            wav_filename -> str - The wav file to be cached.
+
+        Return:
+            str - The filename of the cached wav file.
+        """
+        with self._TempFile() as cache_file:
+            with open(wav_filename, 'rb') as wav_file:
+                shutil.copyfileobj(wav_file, cache_file)
+        return self._Commit(cache_file.name, key)
+
+    def PutSamples(self, key, samples, fmt):
+        """
+        Adds decoded samples to the cache, writing them as a wav file.
+
+        Args:
+            key -> str - The cache key, see Key(...).
+
+            samples -> np.ndarray - A (num_channels, num_frames) array of integer samples.
+
+            fmt -> WavFmt - The audio format of the samples.
+
+        Return:
+            str - The filename of the cached wav file.
+        """
+        with self._TempFile() as cache_file:
+            cache_file.write(fmt.WavHeader(samples.shape[1]))
+            cache_file.write(np.ascontiguousarray(samples.T).tobytes())
+        return self._Commit(cache_file.name, key)
+
+    def Evict(self, keep=None):
+        """
+        Removes the least recently used files from the cache until it fits within its size cap.
+
+        Args:
+            keep -> str - An optional cache key whose file is never evicted, e.g., one that is just about to be read.
+        """
+        keep_name = None if keep is None else keep + self.FILE_EXT
+        total_bytes = 0
+        entries = []
+        for name in os.listdir(self._directory):
+            if not name.endswith(self.FILE_EXT):
+                continue
+            try:
+                stat = os.stat(os.path.join(self._directory, name))
+            except FileNotFoundError:
+                # Another process evicted it in the meantime.
+                continue
+            total_bytes += stat.st_size
+            if name != keep_name:
+                entries.append((stat.st_mtime, stat.st_size, name))
+
+        for _, size, name in sorted(entries):
+            if total_bytes <= self._max_bytes:
+                break
+            try:
+                os.remove(os.path.join(self._directory, name))
+                self._evictions += 1
+            except FileNotFoundError:
+                pass
+            total_bytes -= size
+
+    def _Filename(self, key):
+        """
+        Gets the path of the cache file for a given key.
+        """
+        return os.path.join(self._directory, key + self.FILE_EXT)
+
+    def _TempFile(self):
+        """
+        Opens a new temporary file within the cache directory, that will not be picked up as a cache entry.
+        """
+        return tempfile.NamedTemporaryFile(mode='wb', dir=self._directory, suffix='.tmp', delete=False)
+
+    def _Commit(self, temp_filename, key):
+        """
+        Atomically moves a completely written temporary file into place as the entry for a key, then enforces the size
+        cap, so that readers in other processes never see a partially written entry.
+        """
+        filename = self._Filename(key)
+        os.replace(temp_filename, filename)
+        self.Evict(keep=key)
+        return filename
+
+    @property
+    def hits(self):
+        """
+        int - The number of lookups made through this object that found the file in the cache.
+        """
+        return self._hits
+
+    @property
+    def misses(self):
+        """
+        int - The number of lookups made through this object that did not find the file in the cache, before decoding
+        it into the cache.
+        """
+        return self._misses
+
+    @property
+    def evictions(self):
+        """
+        int - The number of files removed from the cache by this object to keep it within its size cap.
+        """
+        return self._evictions
+
+    @property
+    def size_bytes(self):
+        """
+        int - The current total size in bytes of all files in the cache.
+        """
+        return sum(entry.stat().st_size for entry in os.scandir(self._directory) if entry.name.endswith(self.FILE_EXT))
+
+    @property
+    def max_bytes(self):
+        """
+        int - The maximum total size in bytes of all files in the cache.
+        """
+        return self._max_bytes
@@ -0,0 +1,293 @@
+"""
+Created 10-17-26 by Matthew C. McCallum
+"""
+
+# Local modules
+# None.
+
+# Local submodules
+# None.
+
+# Thirdparty modules
+import numpy as np
+try:
+    import scipy.fft as scipy_fft
+except ImportError:
+    # scipy.fft only exists from scipy 1.4 onward.
+    scipy_fft = None
+try:
+    import pyfftw
+    import pyfftw.builders
+except ModuleNotFoundError:
+    pyfftw = None
+
+# Python library imports
+from abc import ABC, abstractmethod
+import collections
+import threading
+import os
+
+
+class FFTBackend(ABC):
+    """
+    The interface through which every transform in sigtools computes its FFTs, so that the FFT implementation may be
+    chosen globally, with SetFFTBackend(...), or per analyzer. Each method has the same semantics as its np.fft
+    counterpart, except that the precision of the input is kept, i.e., float32 input gives a complex64 result.
+    """
+
+    NAME = None
+
+    @abstractmethod
+    def Fft(self, x, n=None, axis=-1):
+        """
+        Computes the DFT of x along an axis, as in np.fft.fft.
+        """
+        pass
+
+    @abstractmethod
+    def Ifft(self, x, n=None, axis=-1):
+        """
+        Computes the inverse DFT of x along an axis, as in np.fft.ifft.
+        """
+        pass
+
+    @abstractmethod
+    def Rfft(self, x, n=None, axis=-1):
+        """
+        Computes the non-negative frequency DFT bins of real x along an axis, as in np.fft.rfft.
+        """
+        pass
+
+    @abstractmethod
+    def Irfft(self, x, n=None, axis=-1):
+        """
+        Computes the real inverse of the non-negative frequency DFT bins in x along an axis, as in np.fft.irfft.
+        """
+        pass
+
+
+class NumpyFFTBackend(FFTBackend):
+    """
+    Computes FFTs with np.fft, on a single thread. This is the default backend.
+    """
+
+    NAME = 'numpy'
+
+    def Fft(self, x, n=None, axis=-1):
+        return self._KeepPrecision(np.fft.fft(x, n, axis), x)
+
+    def Ifft(self, x, n=None, axis=-1):
+        return self._KeepPrecision(np.fft.ifft(x, n, axis), x)
+
+    def Rfft(self, x, n=None, axis=-1):
+        return self._KeepPrecision(np.fft.rfft(x, n, axis), x)
+
+    def Irfft(self, x, n=None, axis=-1):
+        return self._KeepPrecision(np.fft.irfft(x, n, axis), x, real=True)
+
+    @staticmethod
+    def _KeepPrecision(result, x, real=False):
+        """
+        NumPy before 2.0 always transforms in double precision, so cast the result back to the precision of the input.
+        """
+        x_dtype = np.asarray(x).dtype
+        precision = np.finfo(x_dtype).dtype if x_dtype.kind in 'fc' else np.dtype(np.float64)
+        dtype = precision if real else np.result_type(precision, np.complex64)
+        return result.astype(dtype, copy=False)
+
+
+class ScipyFFTBackend(FFTBackend):
+    """
+    Computes FFTs with scipy.fft, which transforms in the precision of its input, and splits batches of transforms
+    across multiple threads.
+    """
+
+    NAME = 'scipy'
+
+    def __init__(self, workers=-1):
+        """
+        Constructor.
+
+        Args:
+            workers -> int - The number of threads to split batches of transforms across. Negative values count back
+            from the number of CPUs, i.e., -1 uses all of them.
+        """
+        if scipy_fft is None:
+            raise ModuleNotFoundError('The scipy FFT backend requires scipy 1.4 or later.')
+        self._workers = workers
+
+    def Fft(self, x, n=None, axis=-1):
+        return scipy_fft.fft(x, n, axis, workers=self._workers)
+
+    def Ifft(self, x, n=None, axis=-1):
+        return scipy_fft.ifft(x, n, axis, workers=self._workers)
+
+    def Rfft(self, x, n=None, axis=-1):
+        return scipy_fft.rfft(x, n, axis, workers=self._workers)
+
+    def Irfft(self, x, n=None, axis=-1):
+        return scipy_fft.irfft(x, n, axis, workers=self._workers)
+
+    @property
+    def workers(self):
+        """
+        int - The number of threads batches of transforms are split across.
+        """
+        return self._workers
+
+
+class PyFFTWBackend(FFTBackend):
+    """
+    Computes FFTs with FFTW, via the optional pyFFTW package. Planning a transform is expensive, so plans are cached
+    for the most recently used transform shapes and types, and reused whenever a transform of the same shape and type
+    is repeated, e.g., for every file of the same length in a batch.
+    """
+
+    NAME = 'pyfftw'
+
+    MAX_PLANS = 32
+
+    def __init__(self, threads=None, planner_effort='FFTW_MEASURE'):
+        """
+        Constructor.
+
+        Args:
+            threads -> int - The number of threads each transform is computed with. Defaults to the number of CPUs.
+
+            planner_effort -> str - How much effort FFTW puts into finding the fastest plan, e.g., 'FFTW_ESTIMATE' to
+            plan quickly, or 'FFTW_MEASURE' to plan once for faster repeated transforms.
+        """
+        if pyfftw is None:
+            raise ModuleNotFoundError('The pyfftw FFT backend requires the pyFFTW package.')
+        self._threads = threads or os.cpu_count() or 1
+        self._planner_effort = planner_effort
+        # FFTW plans own their input and output arrays, so they cannot be shared between threads.
+        self._local = threading.local()
+        self._hits = 0
+        self._misses = 0
+
+    def Fft(self, x, n=None, axis=-1):
+        return self._Transform(pyfftw.builders.fft, x, n, axis)
+
+    def Ifft(self, x, n=None, axis=-1):
+        return self._Transform(pyfftw.builders.ifft, x, n, axis)
+
+    def Rfft(self, x, n=None, axis=-1):
+        return self._Transform(pyfftw.builders.rfft, x, n, axis)
+
+    def Irfft(self, x, n=None, axis=-1):
+        return self._Transform(pyfftw.builders.irfft, x, n, axis)
+
+    def _Transform(self, builder, x, n, axis):
+        """
+        Computes a transform with a cached plan, planning it first if it is not in the cache.
+
+        Args:
+            builder -> callable - The pyfftw.builders function that plans the transform.
+
+            x -> np.ndarray - The array to be transformed.
+
+            n -> int - The transform length, as in np.fft.
+
+            axis -> int - The axis to transform along.
+
+        Return:
+            np.ndarray - The transformed array.
+        """
+        x = np.asarray(x)
+        plans = getattr(self._local, 'plans', None)
+        if plans is None:
+            plans = self._local.plans = collections.OrderedDict()
+        key = (builder, x.shape, x.strides, x.dtype, n, axis)
+        plan = plans.get(key)
+        if plan is None:
+            self._misses += 1
+            plan = builder(x, n=n, axis=axis, threads=self._threads, planner_effort=self._planner_effort)
+            plans[key] = plan
+            if len(plans) > self.MAX_PLANS:
+                plans.popitem(last=False)
+        else:
+            self._hits += 1
+            plans.move_to_end(key)
+        # The plan's output array is reused by its next execution, so return a copy.
+        return plan(x).copy()
+
+    @property
+    def threads(self):
+        """
+        int - The number of threads each transform is computed with.
+        """
+        return self._threads
+
+    @property
+    def hits(self):
+        """
+        int - The number of transforms that reused a cached plan.
+        """
+        return self._hits
+
+    @property
+    def misses(self):
+        """
+        int - The number of transforms that had to be planned.
+        """
+        return self._misses
+
+
+_BACKENDS = {backend.NAME: backend for backend in (NumpyFFTBackend, ScipyFFTBackend, PyFFTWBackend)}
+_default_backend = NumpyFFTBackend()
+# Backends resolved by name are made once and shared, so that, e.g., FFTW plans are reused between calls.
+_named_backends = {}
+_named_backends_lock = threading.Lock()
+
+
+def MakeFFTBackend(name, **kwargs):
+    """
+    Factory function for making an FFT backend by name.
+
+    Args:
+        name -> str - One of 'numpy', 'scipy' or 'pyfftw'.
+
+        kwargs -> dict - Arguments to the backend's constructor, e.g., workers=8 for scipy.
+
+    Return:
+        FFTBackend - The backend.
+    """
+    if name not in _BACKENDS:
+        raise ValueError('Unknown FFT backend: {0}, expected one of {1}.'.format(name, sorted(_BACKENDS)))
+    return _BACKENDS[name](**kwargs)
+
+
+def SetFFTBackend(backend, **kwargs):
+    """
+    Sets the FFT backend used by every analyzer that has not been given its own.
+
+    Args:
+        backend -> FFTBackend or str - The backend, or the name of a backend to make, see MakeFFTBackend(...).
+
+        kwargs -> dict - Arguments to the backend's constructor, when backend is a name.
+    """
+    global _default_backend
+    _default_backend = MakeFFTBackend(backend, **kwargs) if isinstance(backend, str) else backend
+
+
+def GetFFTBackend(backend=None):
+    """
+    Resolves the FFT backend to use for a transform.
+
+    Args:
+        backend -> FFTBackend or str - A backend, the name of a backend, or None for the global backend set with
+        SetFFTBackend(...). A backend named for the first time is made with its default arguments, and then reused
+        for every later call with the same name.
+
+    Return:
+        FFTBackend - The backend.
+    """
+    if backend is None:
+        return _default_backend
+    if isinstance(backend, str):
+        with _named_backends_lock:
+            if backend not in _named_backends:
+                _named_backends[backend] = MakeFFTBackend(backend)
+            return _named_backends[backend]
+    return backend
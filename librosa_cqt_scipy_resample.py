@@ -8,21 +8,24 @@
 
 from __future__ import division
 
+import os
 import warnings
+import concurrent.futures
 import numpy as np
-import scipy.fftpack as fft
 from numba import jit
 
+from .fft_backend import GetFFTBackend
+
 from librosa.core import audio
 from librosa.core.time_frequency import cqt_frequencies, note_to_hz
-from librosa.core.spectrum import stft
 from librosa.core.pitch import estimate_tuning
 from librosa import cache
 from librosa import filters
 from librosa import util
 from librosa.util.exceptions import ParameterError
 
-__all__ = ['cqt', 'hybrid_cqt', 'pseudo_cqt', 'icqt']
+__all__ = ['cqt', 'hybrid_cqt', 'pseudo_cqt', 'cqt_stream', 'cqt_context',
+           'icqt']
 
 
 @cache(level=20)
@@ -31,7 +34,11 @@ def cqt(y, sr=22050, hop_length=512, fmin=None, n_bins=84,
         norm=1, sparsity=0.01, window='hann',
         scale=True,
         pad_mode='reflect',
-        res_type='scipy'):
+        res_type='scipy',
+        dtype=None,
+        fft_backend=None,
+        basis_cache=None,
+        n_jobs=None):
     '''Compute the constant-Q transform of an audio signal.
     This implementation is based on the recursive sub-sampling method
     described by [1]_.
@@ -40,8 +47,8 @@ def cqt(y, sr=22050, hop_length=512, fmin=None, n_bins=84,
         7th Sound and Music Computing Conference, Barcelona, Spain. 2010.
     Parameters
     ----------
-    y : np.ndarray [shape=(n,)]
-        audio time series
+    y : np.ndarray [shape=(n,) or (n_clips, n)]
+        audio time series, or a batch of equal length audio time series
     sr : number > 0 [scalar]
         sampling rate of `y`
     hop_length : int > 0 [scalar]
@@ -76,9 +83,25 @@ def cqt(y, sr=22050, hop_length=512, fmin=None, n_bins=84,
     pad_mode : string
         Padding mode for centered frame analysis.
         See also: `librosa.core.stft` and `np.pad`.
+    dtype : np.dtype or None
+        Complex data type of the STFT and filter basis, e.g.,
+        `np.complex64` for single precision throughout. `y` is converted
+        to the matching real type. If `None`, the STFT uses the
+        `librosa.core.stft` default and the basis double precision.
+    fft_backend : FFTBackend, str or None
+        The FFT backend computing the STFT and filter basis, see
+        `fft_backend.py`. If `None`, the global backend is used.
+    basis_cache : CQTBasisCache or None
+        A cache to look up the filter bases in, rather than building them
+        on every call, see `cqt_basis_cache.py`. If `None`, the bases are
+        not cached.
+    n_jobs : int > 0, -1 or None
+        The number of threads computing the responses of the octaves,
+        concurrently with resampling the next octave down. `-1` uses
+        every CPU, and `None` or `1` computes the octaves serially.
     Returns
     -------
-    CQT : np.ndarray [shape=(n_bins, t), dtype=np.complex or np.float]
+    CQT : np.ndarray [shape=(n_bins, t) or (n_clips, n_bins, t), dtype=np.complex or np.float]
         Constant-Q value each frequency at each time.
     Raises
     ------
@@ -128,14 +151,17 @@ def cqt(y, sr=22050, hop_length=512, fmin=None, n_bins=84,
     n_octaves = int(np.ceil(float(n_bins) / bins_per_octave))
     n_filters = min(bins_per_octave, n_bins)
 
-    len_orig = len(y)
+    len_orig = y.shape[-1]
 
     if fmin is None:
         # C1 by default
         fmin = note_to_hz('C1')
 
     if tuning is None:
-        tuning = estimate_tuning(y=y, sr=sr)
+        # A batch shares one set of filters, so estimate a single tuning over all of its clips.
+        tuning = estimate_tuning(y=y.ravel(), sr=sr)
+
+    y = __as_dtype(y, dtype)
 
     # First thing, get the freqs of the top octave
     freqs = cqt_frequencies(n_bins, fmin,
@@ -154,11 +180,44 @@ def cqt(y, sr=22050, hop_length=512, fmin=None, n_bins=84,
                                            n_octaves,
                                            nyquist, filter_cutoff, scale)
 
-    cqt_resp = []
-
-    if res_type != 'kaiser_fast':
-
-        # Do the top octave before resampling to allow for fast resampling
+    # Octave responses are submitted to the executor as soon as their
+    # signal is resampled, so they overlap with resampling the next one
+    with __octave_executor(n_jobs) as executor:
+        cqt_resp = []
+
+        if res_type != 'kaiser_fast':
+
+            # Do the top octave before resampling to allow for fast resampling
+            fft_basis, n_fft, _ = __cqt_filter_fft(sr, fmin_t,
+                                                   n_filters,
+                                                   bins_per_octave,
+                                                   tuning,
+                                                   filter_scale,
+                                                   norm,
+                                                   sparsity,
+                                                   window=window,
+                                                   dtype=dtype,
+                                                   fft_backend=fft_backend,
+                                                   basis_cache=basis_cache)
+
+            # Compute the CQT filter response and append it to the stack
+            cqt_resp.append(executor.submit(__cqt_response, y, n_fft, hop_length, fft_basis,
+                                            pad_mode, dtype, fft_backend))
+
+            fmin_t /= 2
+            fmax_t /= 2
+            n_octaves -= 1
+
+            filter_cutoff = fmax_t * (1 + 0.5 * filters.window_bandwidth(window) / Q)
+
+        # Make sure our hop is long enough to support the bottom octave
+        num_twos = __num_two_factors(hop_length)
+        if num_twos < n_octaves - 1:
+            raise ParameterError('hop_length must be a positive integer '
+                                 'multiple of 2^{0:d} for {1:d}-octave CQT'
+                                 .format(n_octaves - 1, n_octaves))
+
+        # Now do the recursive bit
         fft_basis, n_fft, _ = __cqt_filter_fft(sr, fmin_t,
                                                n_filters,
                                                bins_per_octave,
@@ -166,59 +225,34 @@ def cqt(y, sr=22050, hop_length=512, fmin=None, n_bins=84,
                                                filter_scale,
                                                norm,
                                                sparsity,
-                                               window=window)
-
-        # Compute the CQT filter response and append it to the stack
-        cqt_resp.append(__cqt_response(y, n_fft, hop_length, fft_basis, pad_mode))
-
-        fmin_t /= 2
-        fmax_t /= 2
-        n_octaves -= 1
-
-        filter_cutoff = fmax_t * (1 + 0.5 * filters.window_bandwidth(window) / Q)
-
-        res_type = 'kaiser_fast'
+                                               window=window,
+                                               dtype=dtype,
+                                               fft_backend=fft_backend,
+                                               basis_cache=basis_cache)
 
-    # Make sure our hop is long enough to support the bottom octave
-    num_twos = __num_two_factors(hop_length)
-    if num_twos < n_octaves - 1:
-        raise ParameterError('hop_length must be a positive integer '
-                             'multiple of 2^{0:d} for {1:d}-octave CQT'
-                             .format(n_octaves - 1, n_octaves))
-
-    # Now do the recursive bit
-    fft_basis, n_fft, _ = __cqt_filter_fft(sr, fmin_t,
-                                           n_filters,
-                                           bins_per_octave,
-                                           tuning,
-                                           filter_scale,
-                                           norm,
-                                           sparsity,
-                                           window=window)
+        my_y, my_sr, my_hop = y, sr, hop_length
 
-    my_y, my_sr, my_hop = y, sr, hop_length
+        # Iterate down the octaves
+        for i in range(n_octaves):
 
-    # Iterate down the octaves
-    for i in range(n_octaves):
+            # Resample (except first time)
+            if i > 0:
+                if my_y.shape[-1] < 2:
+                    raise ParameterError('Input signal length={} is too short for '
+                                         '{:d}-octave CQT'.format(len_orig,
+                                                                  n_octaves))
 
-        # Resample (except first time)
-        if i > 0:
-            if len(my_y) < 2:
-                raise ParameterError('Input signal length={} is too short for '
-                                     '{:d}-octave CQT'.format(len_orig,
-                                                              n_octaves))
+                my_y = __halfband_decimate(my_y)
 
-            my_y = audio.resample(my_y, my_sr, my_sr/2.0,
-                                  res_type=res_type,
-                                  scale=True)
-            # The re-scale the filters to compensate for downsampling
-            fft_basis[:] *= np.sqrt(2)
+                my_sr /= 2.0
+                my_hop //= 2
 
-            my_sr /= 2.0
-            my_hop //= 2
+            # Compute the cqt filter response and append to the stack, re-scaled
+            # to compensate for downsampling
+            cqt_resp.append(executor.submit(__cqt_response, my_y, n_fft, my_hop, fft_basis,
+                                            pad_mode, dtype, fft_backend, gain=np.sqrt(2)**i))
 
-        # Compute the cqt filter response and append to the stack
-        cqt_resp.append(__cqt_response(my_y, n_fft, my_hop, fft_basis, pad_mode))
+        cqt_resp = [resp.result() for resp in cqt_resp]
 
     C = __trim_stack(cqt_resp, n_bins)
 
@@ -238,15 +272,16 @@ def cqt(y, sr=22050, hop_length=512, fmin=None, n_bins=84,
 def hybrid_cqt(y, sr=22050, hop_length=512, fmin=None, n_bins=84,
                bins_per_octave=12, tuning=0.0, filter_scale=1,
                norm=1, sparsity=0.01, window='hann', scale=True,
-               pad_mode='reflect'):
+               pad_mode='reflect', dtype=None, fft_backend=None, basis_cache=None,
+               n_jobs=None):
     '''Compute the hybrid constant-Q transform of an audio signal.
     Here, the hybrid CQT uses the pseudo CQT for higher frequencies where
     the hop_length is longer than half the filter length and the full CQT
     for lower frequencies.
     Parameters
     ----------
-    y : np.ndarray [shape=(n,)]
-        audio time series
+    y : np.ndarray [shape=(n,) or (n_clips, n)]
+        audio time series, or a batch of equal length audio time series
     sr : number > 0 [scalar]
         sampling rate of `y`
     hop_length : int > 0 [scalar]
@@ -272,9 +307,25 @@ def hybrid_cqt(y, sr=22050, hop_length=512, fmin=None, n_bins=84,
     pad_mode : string
         Padding mode for centered frame analysis.
         See also: `librosa.core.stft` and `np.pad`.
+    dtype : np.dtype or None
+        Complex data type of the STFT and filter basis, e.g.,
+        `np.complex64` for single precision throughout. `y` is converted
+        to the matching real type. If `None`, the STFT uses the
+        `librosa.core.stft` default and the basis double precision.
+    fft_backend : FFTBackend, str or None
+        The FFT backend computing the STFT and filter basis, see
+        `fft_backend.py`. If `None`, the global backend is used.
+    basis_cache : CQTBasisCache or None
+        A cache to look up the filter bases in, rather than building them
+        on every call, see `cqt_basis_cache.py`. If `None`, the bases are
+        not cached.
+    n_jobs : int > 0, -1 or None
+        The number of threads computing the responses of the octaves,
+        concurrently with resampling the next octave down. `-1` uses
+        every CPU, and `None` or `1` computes the octaves serially.
     Returns
     -------
-    CQT : np.ndarray [shape=(n_bins, t), dtype=np.float]
+    CQT : np.ndarray [shape=(n_bins, t) or (n_clips, n_bins, t), dtype=np.float]
         Constant-Q energy for each frequency at each time.
     Raises
     ------
@@ -296,7 +347,8 @@ def hybrid_cqt(y, sr=22050, hop_length=512, fmin=None, n_bins=84,
         fmin = note_to_hz('C1')
 
     if tuning is None:
-        tuning = estimate_tuning(y=y, sr=sr)
+        # A batch shares one set of filters, so estimate a single tuning over all of its clips.
+        tuning = estimate_tuning(y=y.ravel(), sr=sr)
 
     # Get all CQT frequencies
     freqs = cqt_frequencies(n_bins, fmin,
@@ -334,7 +386,10 @@ def hybrid_cqt(y, sr=22050, hop_length=512, fmin=None, n_bins=84,
                                    sparsity=sparsity,
                                    window=window,
                                    scale=scale,
-                                   pad_mode=pad_mode))
+                                   pad_mode=pad_mode,
+                                   dtype=dtype,
+                                   fft_backend=fft_backend,
+                                   basis_cache=basis_cache))
 
     if n_bins_full > 0:
         cqt_resp.append(np.abs(cqt(y, sr,
@@ -348,7 +403,11 @@ def hybrid_cqt(y, sr=22050, hop_length=512, fmin=None, n_bins=84,
                                    sparsity=sparsity,
                                    window=window,
                                    scale=scale,
-                                   pad_mode=pad_mode)))
+                                   pad_mode=pad_mode,
+                                   dtype=dtype,
+                                   fft_backend=fft_backend,
+                                   basis_cache=basis_cache,
+                                   n_jobs=n_jobs)))
 
     return __trim_stack(cqt_resp, n_bins)
 
@@ -357,7 +416,7 @@ def hybrid_cqt(y, sr=22050, hop_length=512, fmin=None, n_bins=84,
 def pseudo_cqt(y, sr=22050, hop_length=512, fmin=None, n_bins=84,
                bins_per_octave=12, tuning=0.0, filter_scale=1,
                norm=1, sparsity=0.01, window='hann', scale=True,
-               pad_mode='reflect'):
+               pad_mode='reflect', dtype=None, fft_backend=None, basis_cache=None):
     '''Compute the pseudo constant-Q transform of an audio signal.
     This uses a single fft size that is the smallest power of 2 that is greater
     than or equal to the max of:
@@ -365,8 +424,8 @@ def pseudo_cqt(y, sr=22050, hop_length=512, fmin=None, n_bins=84,
         2. 2x the hop_length
     Parameters
     ----------
-    y : np.ndarray [shape=(n,)]
-        audio time series
+    y : np.ndarray [shape=(n,) or (n_clips, n)]
+        audio time series, or a batch of equal length audio time series
     sr : number > 0 [scalar]
         sampling rate of `y`
     hop_length : int > 0 [scalar]
@@ -392,9 +451,21 @@ def pseudo_cqt(y, sr=22050, hop_length=512, fmin=None, n_bins=84,
     pad_mode : string
         Padding mode for centered frame analysis.
         See also: `librosa.core.stft` and `np.pad`.
+    dtype : np.dtype or None
+        Complex data type of the STFT and filter basis, e.g.,
+        `np.complex64` for single precision throughout. `y` is converted
+        to the matching real type. If `None`, the STFT uses the
+        `librosa.core.stft` default and the basis double precision.
+    fft_backend : FFTBackend, str or None
+        The FFT backend computing the STFT and filter basis, see
+        `fft_backend.py`. If `None`, the global backend is used.
+    basis_cache : CQTBasisCache or None
+        A cache to look up the filter bases in, rather than building them
+        on every call, see `cqt_basis_cache.py`. If `None`, the bases are
+        not cached.
     Returns
     -------
-    CQT : np.ndarray [shape=(n_bins, t), dtype=np.float]
+    CQT : np.ndarray [shape=(n_bins, t) or (n_clips, n_bins, t), dtype=np.float]
         Pseudo Constant-Q energy for each frequency at each time.
     Raises
     ------
@@ -412,22 +483,28 @@ def pseudo_cqt(y, sr=22050, hop_length=512, fmin=None, n_bins=84,
         fmin = note_to_hz('C1')
 
     if tuning is None:
-        tuning = estimate_tuning(y=y, sr=sr)
+        # A batch shares one set of filters, so estimate a single tuning over all of its clips.
+        tuning = estimate_tuning(y=y.ravel(), sr=sr)
+
+    y = __as_dtype(y, dtype)
 
     fft_basis, n_fft, _ = __cqt_filter_fft(sr, fmin, n_bins,
                                            bins_per_octave,
                                            tuning, filter_scale,
                                            norm, sparsity,
                                            hop_length=hop_length,
-                                           window=window)
+                                           window=window,
+                                           dtype=dtype,
+                                           fft_backend=fft_backend,
+                                           basis_cache=basis_cache)
 
     fft_basis = np.abs(fft_basis)
 
     # Compute the magnitude STFT with Hann window
-    D = np.abs(stft(y, n_fft=n_fft, hop_length=hop_length, pad_mode=pad_mode))
+    D = np.abs(__stft(y, n_fft, hop_length, 'hann', pad_mode, dtype, fft_backend))
 
     # Project onto the pseudo-cqt basis
-    C = fft_basis.dot(D)
+    C = __basis_dot(fft_basis, D)
 
     if scale:
         C /= np.sqrt(n_fft)
@@ -444,6 +521,344 @@ def pseudo_cqt(y, sr=22050, hop_length=512, fmin=None, n_bins=84,
     return C
 
 
+def cqt_stream(y_blocks, sr=22050, hop_length=512, fmin=None, n_bins=84,
+               bins_per_octave=12, tuning=0.0, filter_scale=1,
+               norm=1, sparsity=0.01, window='hann', scale=True,
+               pad_mode='reflect', dtype=None, fft_backend=None,
+               basis_cache=None):
+    '''Compute the constant-Q transform of an audio signal arriving as
+    successive blocks, e.g., from a long recording or live audio.
+    This computes the same recursive sub-sampling CQT as `cqt`, with its
+    default `res_type`, but keeps a buffer for each octave of the
+    downsampling pyramid holding only the samples that its filters and
+    resampler still need. CQT columns are emitted as soon as every octave
+    has computed them, and memory use is bounded by the longest filter
+    rather than the length of the signal.
+    Parameters
+    ----------
+    y_blocks : iterable of np.ndarray [shape=(n,)], real-valued
+        Consecutive blocks of the audio time series, of any length.
+    sr : number > 0 [scalar]
+        sampling rate of `y`
+    hop_length : int > 0 [scalar]
+        number of samples between successive CQT columns.
+    fmin : float > 0 [scalar]
+        Minimum frequency. Defaults to C1 ~= 32.70 Hz
+    n_bins : int > 0 [scalar]
+        Number of frequency bins, starting at `fmin`
+    bins_per_octave : int > 0 [scalar]
+        Number of bins per octave
+    tuning : float in `[-0.5, 0.5)` [scalar]
+        Tuning offset in fractions of a bin (cents). Unlike `cqt`, this
+        may not be `None`, as the whole signal is not available to
+        estimate it from.
+    filter_scale : float > 0
+        Filter scale factor. Small values (<1) use shorter windows
+        for improved time resolution.
+    norm : {inf, -inf, 0, float > 0}
+        Type of norm to use for basis function normalization.
+        See `librosa.util.normalize`.
+    sparsity : float in [0, 1)
+        Sparsify the CQT basis by discarding up to `sparsity`
+        fraction of the energy in each basis.
+        Set `sparsity=0` to disable sparsification.
+    window : str, tuple, number, or function
+        Window specification for the basis filters.
+        See `filters.get_window` for details.
+    scale : bool
+        If `True`, scale the CQT response by square-root the length of
+        each channel's filter.  This is analogous to `norm='ortho'` in FFT.
+        If `False`, do not scale the CQT. This is analogous to
+        `norm=None` in FFT.
+    pad_mode : string
+        Padding mode for centered frame analysis, at the start and end of
+        the signal. Modes that depend on the whole signal, e.g., 'mean',
+        are computed from the samples near each end instead.
+        See also: `librosa.core.stft` and `np.pad`.
+    dtype : np.dtype or None
+        Complex data type of the STFT and filter basis, as for `cqt`.
+    fft_backend : FFTBackend, str or None
+        The FFT backend computing the STFT and filter basis, see
+        `fft_backend.py`. If `None`, the global backend is used.
+    basis_cache : CQTBasisCache or None
+        A cache to look up the filter bases in, see `cqt`.
+    Yields
+    ------
+    CQT : np.ndarray [shape=(n_bins, t), dtype=np.complex or np.float]
+        The next `t` columns of the constant-Q value of each frequency,
+        whenever a block completes any. Concatenating every block gives
+        the `cqt` of the whole signal.
+    Raises
+    ------
+    ParameterError
+        If `hop_length` is not an integer multiple of
+        `2**(n_bins / bins_per_octave)`
+    '''
+
+    if tuning is None:
+        raise ParameterError('tuning must be given to stream a CQT')
+
+    # How many octaves are we dealing with?
+    n_octaves = int(np.ceil(float(n_bins) / bins_per_octave))
+    n_filters = min(bins_per_octave, n_bins)
+
+    if fmin is None:
+        # C1 by default
+        fmin = note_to_hz('C1')
+
+    # Make sure our hop is long enough to support the bottom octave
+    num_twos = __num_two_factors(hop_length)
+    if num_twos < n_octaves - 2:
+        raise ParameterError('hop_length must be a positive integer '
+                             'multiple of 2^{0:d} for {1:d}-octave CQT'
+                             .format(n_octaves - 2, n_octaves))
+
+    # The top octave is analyzed before resampling, as in `cqt`, then
+    # each remaining octave is analyzed with the same filters, one
+    # downsampling level lower than the last.
+    freqs = cqt_frequencies(n_bins, fmin,
+                            bins_per_octave=bins_per_octave)[-bins_per_octave:]
+    fmin_t = np.min(freqs)
+    filter_kwargs = dict(window=window, dtype=dtype, fft_backend=fft_backend,
+                         basis_cache=basis_cache)
+    top_basis, top_n_fft, _ = __cqt_filter_fft(sr, fmin_t, n_filters,
+                                               bins_per_octave, tuning,
+                                               filter_scale, norm, sparsity,
+                                               **filter_kwargs)
+    fft_basis, n_fft, _ = __cqt_filter_fft(sr, fmin_t / 2, n_filters,
+                                           bins_per_octave, tuning,
+                                           filter_scale, norm, sparsity,
+                                           **filter_kwargs)
+
+    # Each response is (level, basis, n_fft, gain), the gain compensating
+    # for downsampling as in `cqt`
+    responses = [(0, top_basis, top_n_fft, 1.0)]
+    responses += [(i, fft_basis, n_fft, np.sqrt(2)**i)
+                  for i in range(n_octaves - 1)]
+    n_levels = max(n_octaves - 1, 1)
+    support = __HALFBAND_SUPPORT if n_levels > 1 else 0
+
+    levels = [__CQTStreamLevel(hop_length // 2**i,
+                            max(r[2] // 2 for r in responses if r[0] == i))
+              for i in range(n_levels)]
+    next_frame = [0] * len(responses)
+    pending = [[] for _ in responses]
+
+    if scale:
+        lengths = filters.constant_q_lengths(sr, fmin,
+                                             n_bins=n_bins,
+                                             bins_per_octave=bins_per_octave,
+                                             tuning=tuning,
+                                             window=window,
+                                             filter_scale=filter_scale)
+
+    def analyze(final):
+        '''Advance every octave as far as the samples received allow.'''
+
+        for i, level in enumerate(levels):
+            if i > 0:
+                levels[i - 1].resample_into(level, __halfband_decimate,
+                                            support, final)
+            level.pad(pad_mode, final)
+
+            # Compute every frame whose samples are all available
+            for r, (r_level, basis, r_n_fft, gain) in enumerate(responses):
+                if r_level != i:
+                    continue
+                end = level.frame_end(r_n_fft // 2, final)
+                if end > next_frame[r]:
+                    segment = level.frame_segment(next_frame[r], end,
+                                                  r_n_fft // 2)
+                    pending[r].append(__cqt_response(segment, r_n_fft,
+                                                     level.hop, basis,
+                                                     pad_mode, dtype,
+                                                     fft_backend,
+                                                     center=False,
+                                                     gain=gain))
+                    next_frame[r] = end
+
+            level.discard([next_frame[r] * level.hop - responses[r][2] // 2
+                           for r in range(len(responses))
+                           if responses[r][0] == i],
+                          levels[i + 1] if i + 1 < n_levels else None,
+                          support)
+
+        # Emit the columns that every octave has computed
+        n_cols = min(sum(x.shape[1] for x in p) for p in pending)
+        if n_cols == 0:
+            return None
+        cqt_resp = []
+        for p in pending:
+            resp = np.hstack(p) if len(p) > 1 else p[0]
+            cqt_resp.append(resp[:, :n_cols])
+            p[:] = [resp[:, n_cols:]]
+
+        C = __trim_stack(cqt_resp, n_bins)
+        if scale:
+            C /= np.sqrt(lengths[:, np.newaxis])
+        return C
+
+    for y in y_blocks:
+        y = __as_dtype(np.asarray(y), dtype)
+        util.valid_audio(y)
+        levels[0].append(y)
+        C = analyze(False)
+        if C is not None:
+            yield C
+
+    if levels[0].n_samples == 0:
+        return
+    C = analyze(True)
+    if C is not None:
+        yield C
+
+
+class __CQTStreamLevel(object):
+    '''The buffered signal of one octave of a streaming CQT.'''
+
+    def __init__(self, hop, pad):
+        self.hop = hop
+        self.pad_len = pad
+        # Samples from absolute index `start`, where negative indices are
+        # the padding before the signal, of which `n_samples` are received
+        self.buffer = np.zeros(0)
+        self.start = 0
+        self.n_samples = 0
+        self.padded = False
+        self.n_resampled = 0
+
+    def append(self, y):
+        self.buffer = np.concatenate((self.buffer.astype(y.dtype, copy=False), y))
+        self.n_samples += len(y)
+
+    def pad(self, mode, final):
+        '''Pad the start once enough samples are received, and the end of
+        the signal when it is final, exactly as centered analysis would.'''
+
+        edge = self.pad_len + 1
+        if final and not self.padded:
+            # The whole signal is short enough to still be buffered
+            self.buffer = np.pad(self.buffer, self.pad_len, mode=mode)
+            self.start = -self.pad_len
+            self.padded = True
+            return
+        if not self.padded and self.n_samples >= edge:
+            head = np.pad(self.buffer[:edge], (self.pad_len, 0), mode=mode)
+            self.buffer = np.concatenate((head[:self.pad_len], self.buffer))
+            self.start = -self.pad_len
+            self.padded = True
+        if final:
+            # At least `edge` samples are always kept, see `discard`
+            tail = np.pad(self.buffer[-edge:], (0, self.pad_len), mode=mode)
+            self.buffer = np.concatenate((self.buffer, tail[-self.pad_len:]))
+
+    def frame_end(self, frame_pad, final):
+        '''The number of frames, centered every hop, that may be computed.'''
+
+        if not self.padded:
+            return 0
+        if final:
+            return 1 + self.n_samples // self.hop
+        if self.n_samples < frame_pad:
+            return 0
+        return (self.n_samples - frame_pad) // self.hop + 1
+
+    def frame_segment(self, begin, end, frame_pad):
+        '''The samples of frames `begin` up to `end`.'''
+
+        first = begin * self.hop - frame_pad - self.start
+        last = (end - 1) * self.hop + frame_pad - self.start
+        return self.buffer[first:last]
+
+    def resample_into(self, lower, decimate, support, final):
+        '''Downsample by an octave into the next level, computing only the
+        samples that the rest of the signal would not change.'''
+
+        if final:
+            n_end = (self.n_samples + 1) // 2
+        else:
+            n_end = max((self.n_samples - 1 - support) // 2 + 1, 0)
+        if n_end <= self.n_resampled:
+            return
+
+        # Start on an even sample, far enough back that the first sample
+        # needed is unaffected by the start of the segment
+        begin = max(0, 2 * self.n_resampled - 2 * ((support + 1) // 2))
+        segment = self.buffer[begin - self.start:self.n_samples - self.start]
+        y = decimate(segment)
+        lower.append(y[self.n_resampled - begin // 2:n_end - begin // 2])
+        self.n_resampled = n_end
+
+    def discard(self, frame_starts, lower, support):
+        '''Drop the samples that no frame or resampling will need again.'''
+
+        if not self.padded:
+            return
+        keep = min(frame_starts + [self.n_samples - self.pad_len - 1])
+        if lower is not None:
+            keep = min(keep, 2 * self.n_resampled - 2 * ((support + 1) // 2))
+        if keep > self.start:
+            self.buffer = self.buffer[keep - self.start:]
+            self.start = keep
+
+
+def cqt_context(sr=22050, hop_length=512, fmin=None, n_bins=84,
+                bins_per_octave=12, tuning=0.0, filter_scale=1,
+                window='hann'):
+    '''Bound how far from its centre a column of `cqt`, `hybrid_cqt` or
+    `pseudo_cqt` depends on the signal.
+    Any column of the transform of a segment of the signal, starting at a
+    multiple of `hop_length`, is identical to the same column of the
+    transform of the whole signal, when the segment holds at least this
+    many samples either side of its centre, or reaches the ends of the
+    signal. This allows a range of columns to be computed exactly, at a
+    cost proportional to the number of columns.
+    Parameters
+    ----------
+    sr : number > 0 [scalar]
+        sampling rate of the signal
+    hop_length : int > 0 [scalar]
+        number of samples between successive CQT columns.
+    fmin : float > 0 [scalar]
+        Minimum frequency. Defaults to C1 ~= 32.70 Hz
+    n_bins : int > 0 [scalar]
+        Number of frequency bins, starting at `fmin`
+    bins_per_octave : int > 0 [scalar]
+        Number of bins per octave
+    tuning : float in `[-0.5, 0.5)` [scalar]
+        Tuning offset in fractions of a bin (cents).
+    filter_scale : float > 0
+        Filter scale factor.
+    window : str, tuple, number, or function
+        Window specification for the basis filters.
+    Returns
+    -------
+    context : int > 0 [scalar]
+        The number of samples either side of the centre of a column.
+    '''
+
+    if fmin is None:
+        # C1 by default
+        fmin = note_to_hz('C1')
+
+    n_octaves = int(np.ceil(float(n_bins) / bins_per_octave))
+
+    # Half the FFT length of each basis is at most its longest filter, or
+    # twice its hop, at the rate of its octave, and so at most the longest
+    # filter of all, or twice the hop, at the rate of the signal
+    lengths = filters.constant_q_lengths(sr, fmin,
+                                         n_bins=n_bins,
+                                         bins_per_octave=bins_per_octave,
+                                         tuning=tuning,
+                                         window=window,
+                                         filter_scale=filter_scale)
+    frame_context = max(int(np.ceil(np.max(lengths))), 2 * hop_length)
+
+    # Each downsampling reaches a little further into the octave above, and
+    # there are no more downsamplings than octaves, or factors of two in the hop
+    return frame_context + __HALFBAND_SUPPORT * max(2**n_octaves, hop_length)
+
+
 @cache(level=40)
 def icqt(C, sr=22050, hop_length=512, fmin=None,
          bins_per_octave=12,
@@ -633,9 +1048,25 @@ def icqt(C, sr=22050, hop_length=512, fmin=None,
 @cache(level=10)
 def __cqt_filter_fft(sr, fmin, n_bins, bins_per_octave, tuning,
                      filter_scale, norm, sparsity, hop_length=None,
-                     window='hann'):
+                     window='hann', dtype=None, fft_backend=None,
+                     basis_cache=None):
     '''Generate the frequency domain constant-Q filter basis.'''
 
+    if basis_cache is not None:
+        key = (sr, fmin, n_bins, bins_per_octave, tuning, filter_scale, norm,
+               sparsity, hop_length, window,
+               None if dtype is None else np.dtype(dtype).str)
+        try:
+            hash(key)
+        except TypeError:
+            # e.g., a window given as an array, which cannot be a key
+            pass
+        else:
+            return basis_cache.Get(key, lambda: __cqt_filter_fft(
+                sr, fmin, n_bins, bins_per_octave, tuning, filter_scale, norm,
+                sparsity, hop_length=hop_length, window=window, dtype=dtype,
+                fft_backend=fft_backend))
+
     basis, lengths = filters.constant_q(sr,
                                         fmin=fmin,
                                         n_bins=n_bins,
@@ -658,43 +1089,130 @@ def __cqt_filter_fft(sr, fmin, n_bins, bins_per_octave, tuning,
     basis *= lengths[:, np.newaxis] / float(n_fft)
 
     # FFT and retain only the non-negative frequencies
-    fft_basis = fft.fft(basis, n=n_fft, axis=1)[:, :(n_fft // 2)+1]
+    fft_basis = GetFFTBackend(fft_backend).Fft(basis, n=n_fft, axis=1)[:, :(n_fft // 2)+1]
 
     # sparsify the basis
     fft_basis = util.sparsify_rows(fft_basis, quantile=sparsity)
 
+    if dtype is not None:
+        fft_basis = fft_basis.astype(dtype)
+
     return fft_basis, n_fft, lengths
 
 
 def __trim_stack(cqt_resp, n_bins):
-    '''Helper function to trim and stack a collection of CQT responses'''
+    '''Helper function to trim and stack a collection of CQT responses,
+    or of batches of responses'''
 
     # cleanup any framing errors at the boundaries
-    max_col = min(x.shape[1] for x in cqt_resp)
+    max_col = min(x.shape[-1] for x in cqt_resp)
 
-    cqt_resp = np.vstack([x[:, :max_col] for x in cqt_resp][::-1])
+    cqt_resp = np.concatenate([x[..., :max_col] for x in cqt_resp][::-1], axis=-2)
 
     # Finally, clip out any bottom frequencies that we don't really want
     # Transpose magic here to ensure column-contiguity
-    return np.ascontiguousarray(cqt_resp[-n_bins:].T).T
+    cqt_resp = np.swapaxes(cqt_resp[..., -n_bins:, :], -1, -2)
+    return np.swapaxes(np.ascontiguousarray(cqt_resp), -1, -2)
+
+
+def __as_dtype(y, dtype):
+    '''Convert a signal to the real type matching a complex CQT dtype.'''
+
+    if dtype is None:
+        return y
+    return np.asarray(y, dtype=np.finfo(dtype).dtype)
+
+
+def __stft(y, n_fft, hop_length, window, pad_mode, dtype, fft_backend,
+           center=True):
+    '''Compute a centered STFT as `librosa.core.stft`, through an FFT backend.
+    If `center` is `False`, the first frame starts at the first sample.'''
 
+    util.valid_audio(y, mono=False)
 
-def __cqt_response(y, n_fft, hop_length, fft_basis, mode):
-    '''Compute the filter response with a target STFT hop.'''
+    fft_window = util.pad_center(filters.get_window(window, n_fft, fftbins=True), size=n_fft)
+    fft_window = fft_window.astype(y.dtype, copy=False)
+
+    if center:
+        y = np.pad(y, [(0, 0)] * (y.ndim - 1) + [(int(n_fft // 2),) * 2], mode=pad_mode)
+    if y.shape[-1] < n_fft:
+        raise ParameterError('Buffer is too short (n={:d})'
+                             ' for frame_length={:d}'.format(y.shape[-1], n_fft))
+
+    # Frame the signal as a strided view, with one frame per row, and for
+    # a batch of signals, one signal per leading index
+    y = np.ascontiguousarray(y)
+    n_frames = 1 + (y.shape[-1] - n_fft) // hop_length
+    y_frames = np.lib.stride_tricks.as_strided(y,
+                                               shape=y.shape[:-1] + (n_frames, n_fft),
+                                               strides=y.strides[:-1] + (y.strides[-1] * hop_length,
+                                                                         y.strides[-1]),
+                                               writeable=False)
+
+    stft_matrix = GetFFTBackend(fft_backend).Rfft(y_frames * fft_window, axis=-1)
+
+    # Match the default output type of `librosa.core.stft`
+    if dtype is None:
+        dtype = np.complex64
+
+    # and its sign convention, which conjugates the DFT
+    return np.conj(np.swapaxes(stft_matrix.astype(dtype, copy=False), -1, -2))
+
+
+def __cqt_response(y, n_fft, hop_length, fft_basis, mode, dtype=None, fft_backend=None,
+                   center=True, gain=1.0):
+    '''Compute the filter response with a target STFT hop, scaled by
+    `gain` rather than scaling the filters, which may be shared through
+    the basis cache.'''
 
     # Compute the STFT matrix
-    D = stft(y, n_fft=n_fft, hop_length=hop_length,
-             window='ones',
-             pad_mode=mode)
+    D = __stft(y, n_fft, hop_length, 'ones', mode, dtype, fft_backend, center)
 
     # And filter response energy
-    return fft_basis.dot(D)
+    response = __basis_dot(fft_basis, D)
+    if gain != 1.0:
+        response *= gain
+    return response
+
+
+def __basis_dot(fft_basis, D):
+    '''Project an STFT onto a filter basis, or a batch of STFTs of shape
+    (n_signals, n_fft_bins, t) in a single sparse matrix product.'''
+
+    if D.ndim == 2:
+        return fft_basis.dot(D)
+
+    # Lay the frames of every signal side by side, which is a view for
+    # the STFTs computed here, as their frames are contiguous
+    n_fft_bins, n_frames = D.shape[-2:]
+    frames = np.swapaxes(D, -1, -2).reshape(-1, n_fft_bins)
+    C = fft_basis.dot(frames.T)
+    return np.swapaxes(C.T.reshape(D.shape[:-2] + (n_frames, -1)), -1, -2)
+
+
+class __SerialExecutor(concurrent.futures.Executor):
+    '''An executor that runs each call as it is submitted.'''
+
+    def submit(self, fn, *args, **kwargs):
+        future = concurrent.futures.Future()
+        future.set_result(fn(*args, **kwargs))
+        return future
+
+
+def __octave_executor(n_jobs):
+    '''Get an executor for the octave responses of a CQT.'''
+
+    if n_jobs == -1:
+        n_jobs = os.cpu_count() or 1
+    if n_jobs is None or n_jobs <= 1:
+        return __SerialExecutor()
+    return concurrent.futures.ThreadPoolExecutor(max_workers=n_jobs)
 
 
 def __early_downsample_count(nyquist, filter_cutoff, hop_length, n_octaves):
     '''Compute the number of early downsampling operations'''
 
-    downsample_count1 = max(0, int(np.ceil(np.log2(audio.BW_FASTEST * nyquist /
+    downsample_count1 = max(0, int(np.ceil(np.log2(__HALFBAND_PASSBAND * nyquist /
                                                    filter_cutoff)) - 1) - 1)
 
     num_twos = __num_two_factors(hop_length)
@@ -715,14 +1233,13 @@ def __early_downsample(y, sr, hop_length, res_type, n_octaves,
 
         hop_length //= downsample_factor
 
-        if len(y) < downsample_factor:
+        if y.shape[-1] < downsample_factor:
             raise ParameterError('Input signal length={:d} is too short for '
-                                 '{:d}-octave CQT'.format(len(y), n_octaves))
+                                 '{:d}-octave CQT'.format(y.shape[-1], n_octaves))
 
         new_sr = sr / float(downsample_factor)
-        y = audio.resample(y, sr, new_sr,
-                           res_type=res_type,
-                           scale=True)
+        for _ in range(downsample_count):
+            y = __halfband_decimate(y)
 
         # If we're not going to length-scale after CQT, we
         # need to compensate for the downsampling factor here
@@ -734,6 +1251,54 @@ def __early_downsample(y, sr, hop_length, res_type, n_octaves,
     return y, sr, hop_length
 
 
+def __halfband_taps(n_taps, beta):
+    '''Design the non-zero, off-centre taps of one side of a half-band
+    lowpass filter, by Kaiser windowing an ideal filter cutting off at a
+    quarter of the sampling rate.'''
+
+    offsets = np.arange(1, 2 * n_taps, 2)
+    taps = 0.5 * np.sinc(offsets / 2.0) * np.kaiser(4 * n_taps - 1, beta)[offsets + 2 * n_taps - 1]
+
+    # Unit gain at DC, with the centre tap of 0.5
+    return taps * (0.25 / np.sum(taps))
+
+
+# A 79 tap half-band filter, flat to within 0.0005dB up to 85% of the
+# downsampled Nyquist frequency, and attenuating by 85dB from 115% of it,
+# so that nothing aliases into the passband
+__HALFBAND_TAPS = __halfband_taps(20, 8.5)
+__HALFBAND_SUPPORT = 2 * len(__HALFBAND_TAPS) - 1
+__HALFBAND_PASSBAND = 0.85
+
+
+def __halfband_decimate(y):
+    '''Downsample by a factor of two along the last axis, with the
+    half-band filter `__HALFBAND_TAPS`, scaled by `sqrt(2)` as
+    `audio.resample(..., scale=True)` is.
+    Only the even samples are filtered, and every other tap of a half-band
+    filter is zero, so this is linear in the signal length, and works for
+    any length. The signal is zero beyond its ends, and output sample `n`
+    is centred on input sample `2n`.'''
+
+    n_taps = len(__HALFBAND_TAPS)
+    n_out = (y.shape[-1] + 1) // 2
+    taps = (np.sqrt(2) * __HALFBAND_TAPS).astype(y.dtype)
+
+    # Pad to keep the parity of the samples, then split into the even
+    # samples, that only the centre tap applies to, and the odd samples
+    pad = [(0, 0)] * (y.ndim - 1) + [(2 * n_taps, 2 * n_out - y.shape[-1] + 2 * n_taps)]
+    y_pad = np.pad(y, pad, mode='constant')
+    y_even = y_pad[..., 0::2]
+    y_odd = y_pad[..., 1::2]
+
+    y_hat = y_even[..., n_taps:n_taps + n_out] * y.dtype.type(np.sqrt(0.5))
+    for i, tap in enumerate(taps):
+        y_hat += tap * (y_odd[..., n_taps + i:n_taps + i + n_out] +
+                        y_odd[..., n_taps - i - 1:n_taps - i - 1 + n_out])
+
+    return y_hat
+
+
 def __num_two_factors(x):
     """Return how many times integer x can be evenly divided by 2.
     Returns 0 for non-positive integers.
@@ -6,25 +6,161 @@ Created 04-11-18 by Matthew C. McCallum
 # Local imports
 from .mp3_read import Mp3Read
 from .wav_read import WavRead
+from .wav_memmap_read import WavMemmapRead
 
 # Third party imports
 from data_access import *
+import numpy as np
 
 # Standard library imports
+import concurrent.futures
+import collections
+import functools
+import itertools
+import asyncio
 import os
 
 
-def MakeAudioReader(url):
+AudioBatchResult = collections.namedtuple('AudioBatchResult', ['index', 'url', 'result', 'error'])
+AudioBatchResult.__doc__ = """
+The outcome of reading a single file in MakeAudioReaderBatch(...): the position of the url in the input, the url
+itself, the reader or float samples (None on failure), and the exception raised while reading (None on success).
+"""
+
+
+def MakeAudioReader(url, decode_cache=None):
     """
     Factory function for making an AudioRead type object of various types, dependent on the file type.
 
     Args:
         url -> str - The URL of the audio file thing to read.
 
+        decode_cache -> DecodeCache - An optional persistent cache of decoded audio, used for compressed file types.
+
     Return:
         AudioRead - An object for reading from files.
     """
     if os.path.splitext(url)[1] == '.mp3':
-        return Mp3Read(get_stream(url, 'rb'))
+        return Mp3Read(get_stream(url, 'rb'), decode_cache=decode_cache)
     elif os.path.splitext(url)[1] == '.wav':
-        return WavRead(get_stream(url, 'rb'))
\ No newline at end of file
+        if os.path.isfile(url):
+            # Local files are memory mapped so that nothing is read until it is needed.
+            return WavMemmapRead(url)
+        return WavRead(get_stream(url, 'rb'))
+
+
+async def MakeAudioReaderAsync(url, decode_cache=None):
+    """
+    The asyncio counterpart of MakeAudioReader(...). Making a reader opens the file and parses its header, which may
+    block on remote storage, so that is done in the event loop's default executor. Decoding is then done without
+    blocking the event loop through the reader's ReadSamplesFloatAsync(...).
+
+    Args:
+        url -> str - The URL of the audio file thing to read.
+
+        decode_cache -> DecodeCache - An optional persistent cache of decoded audio, used for compressed file types.
+
+    Return:
+        AudioRead - An object for reading from files.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, functools.partial(MakeAudioReader, url, decode_cache=decode_cache))
+
+
+def _ReadAudio(url, read_samples, decode_cache, dtype):
+    """
+    Worker function for MakeAudioReaderBatch(...), at module scope so that it may be sent to worker processes.
+
+    Args:
+        url -> str - The URL of the audio file to read.
+
+        read_samples -> bool - Whether to decode and return all samples, rather than just the reader.
+
+        decode_cache -> DecodeCache - An optional persistent cache of decoded audio.
+
+        dtype -> np.dtype - The floating point type of the returned samples.
+
+    Return:
+        AudioRead or np.ndarray - The reader, or all of its samples as a (num_channels, num_frames) float array.
+    """
+    reader = MakeAudioReader(url, decode_cache=decode_cache)
+    if read_samples:
+        return reader.ReadSamplesFloat(dtype=dtype)
+    return reader
+
+
+def MakeAudioReaderBatch(urls, read_samples=True, max_workers=None, use_processes=False, ordered=True,
+                         max_pending=None, decode_cache=None, dtype=np.float64):
+    """
+    A generator that reads many audio files in parallel on a bounded pool of workers. Decoding, e.g., running ffmpeg
+    for mp3 files, happens concurrently, while results are yielded one at a time as they are consumed.
+
+    Args:
+        urls -> iterable(str) - The URLs of the audio files to read. This may be lazy, urls are only taken from it as
+        there is room for more work to be submitted.
+
+        read_samples -> bool - If True, each result is the float samples of the file as returned by
+        ReadSamplesFloat(). If False, each result is the AudioRead object itself, e.g., for ranged reads later.
+
+        max_workers -> int - The number of files read concurrently. Defaults to the number of CPUs.
+
+        use_processes -> bool - Whether to use a pool of processes rather than threads. Threads are sufficient when
+        decoding happens in ffmpeg subprocesses or NumPy, but processes avoid the GIL for Python heavy readers. Only
+        samples, not readers, can be returned from worker processes.
+
+        ordered -> bool - If True, results are yielded in the same order as urls, otherwise as they complete.
+
+        max_pending -> int - The maximum number of files submitted but not yet yielded, bounding the memory held in
+        results waiting to be consumed. Defaults to twice max_workers.
+
+        decode_cache -> DecodeCache - An optional persistent cache of decoded audio. Note that with use_processes,
+        each worker process counts its cache hits and misses on its own copy of the cache object.
+
+        dtype -> np.dtype - The floating point type of the samples returned when read_samples is True, e.g.,
+        np.float32 to halve the memory held in results.
+
+    Return:
+        AudioBatchResult - Yields a result for every url. Any exception raised while reading a file is captured in
+        the result's error field rather than being raised, so that one bad file doesn't stop the batch.
+    """
+    if use_processes and not read_samples:
+        raise ValueError('Readers cannot be returned from worker processes, use threads or read_samples=True.')
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    if max_pending is None:
+        max_pending = 2*max_workers
+    if max_pending < 1:
+        raise ValueError('max_pending must be at least 1, got {0}.'.format(max_pending))
+
+    executor_type = concurrent.futures.ProcessPoolExecutor if use_processes else concurrent.futures.ThreadPoolExecutor
+    executor = executor_type(max_workers=max_workers)
+    urls = enumerate(urls)
+    pending = collections.OrderedDict()
+
+    def submit(num_files):
+        for index, url in itertools.islice(urls, num_files):
+            pending[executor.submit(_ReadAudio, url, read_samples, decode_cache, dtype)] = (index, url)
+
+    def result(future):
+        index, url = pending.pop(future)
+        try:
+            return AudioBatchResult(index, url, future.result(), None)
+        except Exception as error:
+            return AudioBatchResult(index, url, None, error)
+
+    try:
+        submit(max_pending)
+        while pending:
+            if ordered:
+                done = [next(iter(pending))]
+            else:
+                done, _ = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in done:
+                yield result(future)
+            submit(len(done))
+    finally:
+        # Don't start any more work if the caller stops iterating early. Futures are cancelled here, rather than with
+        # shutdown(cancel_futures=True), which requires Python 3.9.
+        for future in pending:
+            future.cancel()
+        executor.shutdown(wait=True)
@@ -5,15 +5,21 @@ Created 04-11-18 by Matthew C. McCallum
 
 # Local imports
 from .wav_read import *
+from .wav_memmap_read import WavMemmapRead
 from .audio_read import *
 
 # Third party imports
 import mutagen.mp3
+import numpy as np
 
 # Python standard library imports
 import tempfile
 import subprocess
 import shutil
+import struct
+import threading
+import asyncio
+import weakref
 import os
 
 
@@ -24,25 +30,66 @@ class Mp3Read(AudioRead):
 
     WAV_SAMP_RATE = 44100
     WAV_BIT_DEPTH = 16
-    WAV_FFMPEG_FMT = 'pcm_s' + str(WAV_BIT_DEPTH) + 'le'
 
-    def __init__(self, filename):
+    SAMPLE_FMT_S16 = 's16'
+    SAMPLE_FMT_S32 = 's32'
+    SAMPLE_FMT_F32 = 'f32'
+    # The bit depth and whether samples are floats, for each sample format. Each sample format name is also the ffmpeg
+    # name of the format, as in the pcm_<fmt>le codec and <fmt>le raw container.
+    SAMPLE_FMTS = {SAMPLE_FMT_S16: (16, False),
+                   SAMPLE_FMT_S32: (32, False),
+                   SAMPLE_FMT_F32: (32, True)}
+
+    DECODE_TEMP_WAV = 'temp_wav'
+    DECODE_PIPE = 'pipe'
+
+    RAW = 'raw'
+
+    PIPE_CHUNK_BYTES = 2**16
+
+    MAX_CONCURRENT_DECODES = os.cpu_count() or 1
+    _decode_limiters = weakref.WeakKeyDictionary()
+
+    def __init__(self, filename, decode_mode=DECODE_TEMP_WAV, decode_cache=None, samp_rate=WAV_SAMP_RATE,
+                 n_channels=None, sample_fmt=SAMPLE_FMT_S16):
         """
         Constructor.
 
         Args:
             filename -> str - The url of the file to be read.
+
+            decode_mode -> str - How the mp3 data is decoded. Either DECODE_TEMP_WAV, to have ffmpeg write a temporary
+            wav file that is then read from, or DECODE_PIPE, to read raw PCM directly from the ffmpeg output stream
+            into memory, without creating any files on disk.
+
+            decode_cache -> DecodeCache - An optional persistent cache of decoded audio. If provided, the whole file is
+            decoded into the cache the first time it is needed, and the cached file is memory mapped for all reads.
+
+            samp_rate -> int - The sampling rate in Hz to decode to. ffmpeg resamples while decoding, so there is no
+            need to resample the decoded audio again later.
+
+            n_channels -> int - The number of channels to decode to, e.g., 1 to have ffmpeg downmix to mono while
+            decoding. If None, the number of channels in the mp3 file is used.
+
+            sample_fmt -> str - The sample format to decode to, one of the SAMPLE_FMT_* constants.
         """
         # Note: all the file reading / decoding / conversion to wav is done just in time, to prevent additional overhead
         # when you might only need the class for something like getting the mp3 audio length.
         self._file = filename
+        self._decode_mode = decode_mode
+        self._decode_cache = decode_cache
+        self._cache_key = None
         self._temp_file = None
         self._temp_filename = None
+        self._samples = None
         self._data = None
-        n_channels = mutagen.mp3.MP3(self._file).info.channels
-        if type(self._file) is not str:
-            self._file.seek(0)
-        self._fmt = WavFmt(samp_rate=self.WAV_SAMP_RATE, n_channels=n_channels, bit_depth=self.WAV_BIT_DEPTH)
+        self._sample_fmt = sample_fmt
+        if n_channels is None:
+            n_channels = mutagen.mp3.MP3(self._file).info.channels
+            if type(self._file) is not str:
+                self._file.seek(0)
+        bit_depth, is_float = self.SAMPLE_FMTS[sample_fmt]
+        self._fmt = WavFmt(samp_rate=samp_rate, n_channels=n_channels, bit_depth=bit_depth, is_float=is_float)
 
     def __del__(self):
         """
@@ -53,6 +100,7 @@ class Mp3Read(AudioRead):
         """
         del self._temp_file
         self._temp_filename = None
+        self._samples = None
         self._data = None
 
     def ConvertFile(self):
@@ -60,38 +108,516 @@ class Mp3Read(AudioRead):
         Converts the file to a temporary wav file. Once converted this wav file will stick around as long as this object
         exists.
         """
-        self._temp_file = tempfile.NamedTemporaryFile(mode='r+b', suffix='.wav')
+        self._temp_file = self._DecodeToWav()
         self._temp_filename = self._temp_file.name
 
+        # Update channels in case the mp3 metadata was wrong before
+        wav_file = WavMemmapRead(self._temp_filename)
+        self._fmt.n_channels = wav_file.fmt.n_channels
+
+    def _DecodeToWav(self, start_seconds=0.0, duration=None):
+        """
+        Decodes the mp3 file, or a window of it, into a new temporary wav file.
+
+        Args:
+            start_seconds -> float - The time in seconds at which to start decoding. ffmpeg seeks to this point in the
+            input rather than decoding from the start.
+
+            duration -> float - The number of seconds of audio to decode. If None, the file is decoded until the end.
+
+        Return:
+            tempfile.NamedTemporaryFile - An open temporary wav file, positioned at its start, that is deleted when
+            it is closed or garbage collected.
+        """
+        wav_file = tempfile.NamedTemporaryFile(mode='r+b', suffix='.wav')
+
         # Write wav data
+        fname, temp_mp3_file = self._LocalInput()
+        subprocess.run(self._FfmpegCommand(fname, "wav", start_seconds, duration), stdout=wav_file)
+        self._FixWavHeader(wav_file)
+
+        return wav_file
+
+    def _LocalInput(self):
+        """
+        Gets a local filename from which ffmpeg can read the mp3 file.
+
+        Return:
+            str - The filename of the mp3 file on local disk.
+
+            tempfile.NamedTemporaryFile - If the mp3 file is a stream, the temporary file it was copied to, which must
+            be kept open until ffmpeg is finished with it. Otherwise None.
+        """
         if type(self._file) is not str:
             # Copy to a local location first in case it is remote...
             temp_mp3_file = tempfile.NamedTemporaryFile(mode='r+b', suffix='.mp3')
             temp_mp3_file.write(self._file.read())
+            temp_mp3_file.flush()
             self._file.seek(0)
-            fname = temp_mp3_file.name
-        else:
-            fname = self._file
-        subprocess.run(
-            ["ffmpeg", "-loglevel", "panic", "-i", fname, "-map_metadata", "-1", "-vn", "-acodec", self.WAV_FFMPEG_FMT, "-ac",
-             str(self._fmt.n_channels), "-ar", str(self.WAV_SAMP_RATE), "-f", "wav", 'pipe:1'], stdout=self._temp_file)
+            return temp_mp3_file.name, temp_mp3_file
+        return self._file, None
+
+    def _PipeInput(self):
+        """
+        Gets the input from which ffmpeg can read the mp3 file, without writing anything to disk.
 
+        Return:
+            str - The filename of the mp3 file, or 'pipe:0' if it is to be read from standard input.
+
+            bytes - The mp3 file data to be written to ffmpeg's standard input, or None if it reads from a file.
+        """
+        if type(self._file) is not str:
+            input_data = self._file.read()
+            self._file.seek(0)
+            return 'pipe:0', input_data
+        return self._file, None
+
+    @staticmethod
+    def _FixWavHeader(wav_file):
+        """
+        Fills in the RIFF and data chunk sizes of a wav file written by ffmpeg, and rewinds it.
+
+        Args:
+            wav_file -> file - An open, seekable and writable wav file.
+        """
         # Fix file size as ffmpeg output via std stream doesn't include a file size.
-        self._temp_file.seek(0)
-        file_length = self._temp_file.seek(0, 2)
-        self._temp_file.seek(4)
-        self._temp_file.write(struct.pack('i', file_length - 8))
-        self._temp_file.seek(0)
-        test_data = self._temp_file.read(10000)
+        wav_file.seek(0)
+        file_length = wav_file.seek(0, 2)
+        wav_file.seek(4)
+        wav_file.write(struct.pack('i', file_length - 8))
+        wav_file.seek(0)
+        test_data = wav_file.read(10000)
         data_start = test_data.find(b'data')
-        self._temp_file.seek(data_start + 4)
-        self._temp_file.write(struct.pack('i', file_length - data_start - 8))
-        self._temp_file.seek(0)
+        wav_file.seek(data_start + 4)
+        wav_file.write(struct.pack('i', file_length - data_start - 8))
+        wav_file.seek(0)
+
+    def _FfmpegCommand(self, input_name, output_fmt, start_seconds=0.0, duration=None):
+        """
+        Builds the ffmpeg command line for decoding the mp3 file, or a window of it, to standard output.
+
+        Args:
+            input_name -> str - The filename of the mp3 file to decode, or 'pipe:0' to decode from standard input.
+
+            output_fmt -> str - The ffmpeg output container format, e.g., 'wav', or RAW to output raw PCM samples.
+
+            start_seconds -> float - The time in seconds at which to start decoding.
+
+            duration -> float - The number of seconds of audio to decode. If None, the file is decoded until the end.
+
+        Return:
+            list(str) - The ffmpeg command and its arguments.
+        """
+        seek_args = []
+        if start_seconds:
+            seek_args += ["-ss", str(start_seconds)]
+        if duration is not None:
+            seek_args += ["-t", str(duration)]
+        if output_fmt == self.RAW:
+            output_fmt = self._sample_fmt + 'le'
+        return ["ffmpeg", "-loglevel", "panic"] + seek_args + ["-f", "mp3", "-i", input_name, "-map_metadata", "-1",
+                "-vn", "-acodec", 'pcm_' + self._sample_fmt + 'le', "-ac", str(self._fmt.n_channels), "-ar",
+                str(self._fmt.samp_rate), "-f", output_fmt, 'pipe:1']
+
+    def _DecodeToArray(self, start_seconds=0.0, duration=None):
+        """
+        Decodes the mp3 file, or a window of it, directly into memory by reading raw PCM from the ffmpeg output stream.
+        Streams are fed to ffmpeg's standard input, so no files are written to disk.
+
+        Args:
+            start_seconds -> float - The time in seconds at which to start decoding.
+
+            duration -> float - The number of seconds of audio to decode. If None, the file is decoded until the end.
+
+        Return:
+            np.ndarray - A read-only (num_channels, num_frames) integer view on the decoded PCM data.
+        """
+        input_name, input_data = self._PipeInput()
+        result = subprocess.run(self._FfmpegCommand(input_name, self.RAW, start_seconds, duration),
+                                input=input_data,
+                                stdout=subprocess.PIPE)
+        frames = np.frombuffer(result.stdout, dtype=self._fmt.SampleDtype())
+        return frames.reshape((-1, self._fmt.n_channels)).T
+
+    def _UsesSamples(self):
+        """
+        Whether decoded samples are read from an array, i.e., when decoding via pipes or through a decode cache, rather
+        than from a temporary wav file.
+
+        Return:
+            bool - True if reads should go through _Samples(...).
+        """
+        return self._decode_mode == self.DECODE_PIPE or self._decode_cache is not None
+
+    def _CacheKey(self):
+        """
+        Gets the decode cache key for this file, hashing the file contents the first time it is needed.
+
+        Return:
+            str - The cache key, see DecodeCache.Key(...).
+        """
+        if self._cache_key is None:
+            self._cache_key = self._decode_cache.Key(self._decode_cache.ContentHash(self._file), self._fmt)
+        return self._cache_key
+
+    def _CachedSamples(self, count_miss=True):
+        """
+        Looks up the decoded file in the decode cache.
+
+        Args:
+            count_miss -> bool - Whether not finding the file counts as a cache miss, i.e., whether the whole file
+            will be decoded into the cache if it is not there.
+
+        Return:
+            np.ndarray - A read-only (num_channels, num_frames) integer view on the memory mapped cache file, or None
+            if the file is not in the cache.
+        """
+        filename = self._decode_cache.Get(self._CacheKey(), count_miss=count_miss)
+        if filename is None:
+            return None
+        return WavMemmapRead(filename).samples
+
+    def _DecodeAll(self):
+        """
+        Decodes the whole file, adding it to the decode cache if there is one.
+
+        Return:
+            np.ndarray - A read-only (num_channels, num_frames) integer array of all samples in the file.
+        """
+        if self._decode_cache is None:
+            return self._DecodeToArray()
+
+        if self._decode_mode == self.DECODE_PIPE:
+            return self._CacheSamples(self._DecodeToArray())
+
+        if not self._temp_file:
+            self.ConvertFile()
+        return self._CacheSamples()
+
+    def _CacheSamples(self, samples=None):
+        """
+        Adds the whole decoded file to the decode cache.
+
+        Args:
+            samples -> np.ndarray - The (num_channels, num_frames) integer samples of the whole file, if it was decoded
+            into memory. If None, the file converted to a temporary wav file by ConvertFile() is cached instead.
+
+        Return:
+            np.ndarray - A read-only (num_channels, num_frames) integer view on the memory mapped cache file.
+        """
+        if samples is not None:
+            filename = self._decode_cache.PutSamples(self._CacheKey(), samples, self._fmt)
+        else:
+            filename = self._decode_cache.PutFile(self._CacheKey(), self._temp_filename)
+            # The cached copy supersedes the temporary file, so don't keep both on disk.
+            self._temp_file = None
+            self._temp_filename = None
+        return WavMemmapRead(filename).samples
+
+    def _Samples(self, start_seconds, duration):
+        """
+        Gets the requested window of integer samples when decoding via pipes or a decode cache. Once the whole file has
+        been decoded, the decoded samples are kept, in memory or memory mapped from the cache, and reused. Otherwise
+        only the requested window is decoded.
+
+        Args:
+            start_seconds -> float - The time in seconds of the first sample to be read.
+
+            duration -> float - The number of seconds of audio to be read. If None, all samples up until the end of the
+            file are to be read.
+
+        Return:
+            np.ndarray - A read-only (num_channels, num_frames) integer array of the requested samples.
+        """
+        ranged = bool(start_seconds or duration is not None)
+        if self._samples is None and self._decode_cache is not None:
+            self._samples = self._CachedSamples(count_miss=not ranged)
+
+        if self._samples is None and ranged:
+            return self._DecodeToArray(start_seconds, duration)
+
+        if self._samples is None:
+            self._samples = self._DecodeAll()
+
+        start_frame, end_frame = self._FrameRange(start_seconds, duration, self._samples.shape[1])
+        return self._samples[:, start_frame:end_frame]
+
+    @classmethod
+    def _DecodeLimiter(cls):
+        """
+        Gets the semaphore limiting the number of ffmpeg processes run concurrently by the async methods of this class
+        on the current event loop.
+
+        Return:
+            asyncio.Semaphore - A semaphore allowing MAX_CONCURRENT_DECODES concurrent decodes.
+        """
+        loop = asyncio.get_running_loop()
+        if loop not in cls._decode_limiters:
+            cls._decode_limiters[loop] = asyncio.Semaphore(cls.MAX_CONCURRENT_DECODES)
+        return cls._decode_limiters[loop]
+
+    async def _RunFfmpegAsync(self, command, input_data, stdout, limiter):
+        """
+        Runs ffmpeg as an asyncio subprocess, without blocking the event loop.
+
+        Args:
+            command -> list(str) - The ffmpeg command and its arguments, see _FfmpegCommand(...).
+
+            input_data -> bytes - Data to be written to ffmpeg's standard input, or None if it reads from a file.
+
+            stdout -> file or int - Where to send ffmpeg's output, e.g., an open file, or asyncio.subprocess.PIPE to
+            return it.
+
+            limiter -> asyncio.Semaphore - Limits the number of concurrent decodes. If None, the class wide limiter for
+            the current event loop is used.
+
+        Return:
+            bytes - ffmpeg's output if stdout is asyncio.subprocess.PIPE, otherwise None.
+        """
+        if limiter is None:
+            limiter = self._DecodeLimiter()
+        async with limiter:
+            process = await asyncio.create_subprocess_exec(
+                *command,
+                stdin=asyncio.subprocess.DEVNULL if input_data is None else asyncio.subprocess.PIPE,
+                stdout=stdout)
+            try:
+                output, _ = await process.communicate(input_data)
+            except BaseException:
+                # e.g., if the awaiting task is cancelled, don't leave ffmpeg running outside of the limiter.
+                try:
+                    process.kill()
+                except ProcessLookupError:
+                    pass
+                await process.wait()
+                raise
+        return output
+
+    @staticmethod
+    async def _RunBlockingAsync(func, *args):
+        """
+        Runs a function that blocks on file IO, e.g., hashing, copying or caching a whole file, in the event loop's
+        default executor, so that the event loop is not blocked.
+
+        Args:
+            func -> callable - The function to run.
+
+            args -> tuple - The arguments to func.
+
+        Return:
+            object - The return value of func.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, func, *args)
+
+    async def _DecodeToWavAsync(self, start_seconds=0.0, duration=None, limiter=None):
+        """
+        The asyncio counterpart of _DecodeToWav(...).
+        """
+        wav_file = tempfile.NamedTemporaryFile(mode='r+b', suffix='.wav')
+        fname, temp_mp3_file = await self._RunBlockingAsync(self._LocalInput)
+        await self._RunFfmpegAsync(self._FfmpegCommand(fname, "wav", start_seconds, duration), None, wav_file, limiter)
+        await self._RunBlockingAsync(self._FixWavHeader, wav_file)
+        return wav_file
+
+    async def _DecodeToArrayAsync(self, start_seconds=0.0, duration=None, limiter=None):
+        """
+        The asyncio counterpart of _DecodeToArray(...).
+        """
+        input_name, input_data = await self._RunBlockingAsync(self._PipeInput)
+        output = await self._RunFfmpegAsync(self._FfmpegCommand(input_name, self.RAW, start_seconds, duration),
+                                            input_data,
+                                            asyncio.subprocess.PIPE,
+                                            limiter)
+        frames = np.frombuffer(output, dtype=self._fmt.SampleDtype())
+        return frames.reshape((-1, self._fmt.n_channels)).T
+
+    async def _DecodeAllAsync(self, limiter):
+        """
+        The asyncio counterpart of _DecodeAll().
+        """
+        if self._decode_cache is None:
+            return await self._DecodeToArrayAsync(limiter=limiter)
+
+        if self._decode_mode == self.DECODE_PIPE:
+            samples = await self._DecodeToArrayAsync(limiter=limiter)
+            return await self._RunBlockingAsync(self._CacheSamples, samples)
+
+        if not self._temp_file:
+            await self.ConvertFileAsync(limiter)
+        return await self._RunBlockingAsync(self._CacheSamples)
+
+    async def _SamplesAsync(self, start_seconds, duration, limiter):
+        """
+        The asyncio counterpart of _Samples(...).
+        """
+        ranged = bool(start_seconds or duration is not None)
+        if self._samples is None and self._decode_cache is not None:
+            self._samples = await self._RunBlockingAsync(self._CachedSamples, not ranged)
+
+        if self._samples is None and ranged:
+            return await self._DecodeToArrayAsync(start_seconds, duration, limiter)
+
+        if self._samples is None:
+            self._samples = await self._DecodeAllAsync(limiter)
+
+        start_frame, end_frame = self._FrameRange(start_seconds, duration, self._samples.shape[1])
+        return self._samples[:, start_frame:end_frame]
+
+    async def ConvertFileAsync(self, limiter=None):
+        """
+        Converts the file to a temporary wav file, as in ConvertFile(), but running ffmpeg as an asyncio subprocess so
+        that the event loop is not blocked.
+
+        Args:
+            limiter -> asyncio.Semaphore - Limits the number of concurrent decodes. If None, the class wide limiter
+            allowing MAX_CONCURRENT_DECODES decodes on the current event loop is used.
+        """
+        self._temp_file = await self._DecodeToWavAsync(limiter=limiter)
+        self._temp_filename = self._temp_file.name
 
         # Update channels in case the mp3 metadata was wrong before
-        wav_file = WavRead(self._temp_file)
+        wav_file = WavMemmapRead(self._temp_filename)
         self._fmt.n_channels = wav_file.fmt.n_channels
 
+    async def ReadSamplesFloatAsync(self, start_seconds=0.0, duration=None, dtype=np.float64, limiter=None):
+        """
+        Reads samples as floats, as in ReadSamplesFloat(...), but running ffmpeg as an asyncio subprocess so that
+        the event loop is not blocked while decoding.
+        This replaces any previous data read from file.
+
+        Args:
+            start_seconds -> float - The time in seconds of the first sample to read.
+
+            duration -> float - The number of seconds of audio to read. If None, all samples up until the end of the
+            file are read.
+
+            dtype -> np.dtype - The floating point type of the returned samples, e.g., np.float32 to halve memory use.
+
+            limiter -> asyncio.Semaphore - Limits the number of concurrent decodes. If None, the class wide limiter
+            allowing MAX_CONCURRENT_DECODES decodes on the current event loop is used.
+
+        Return:
+            np.ndarray - An array of dimensions (num_channels, num_frames) containing float valued audio samples.
+        """
+        if self._UsesSamples():
+            samples = await self._SamplesAsync(start_seconds, duration, limiter)
+        elif not self._temp_file and (start_seconds or duration is not None):
+            with await self._DecodeToWavAsync(start_seconds, duration, limiter) as wav_file:
+                samples = await self._RunBlockingAsync(lambda: np.array(WavMemmapRead(wav_file.name).samples))
+        else:
+            if not self._temp_file:
+                await self.ConvertFileAsync(limiter)
+            samples = await self._RunBlockingAsync(WavMemmapRead(self._temp_filename).ReadSamplesInt, start_seconds,
+                                                   duration)
+        self._data = self._fmt.IntToFloat(samples, dtype=dtype)
+        return self._data
+
+    def _FeedPipe(self, pipe):
+        """
+        Copies the mp3 stream into the standard input of an ffmpeg process, in chunks, then closes it.
+
+        Args:
+            pipe -> file - The writable standard input of the ffmpeg process.
+        """
+        try:
+            shutil.copyfileobj(self._file, pipe, self.PIPE_CHUNK_BYTES)
+        except BrokenPipeError:
+            # ffmpeg was stopped before consuming all of its input, e.g., the block stream was abandoned.
+            pass
+        finally:
+            self._file.seek(0)
+            try:
+                pipe.close()
+            except BrokenPipeError:
+                pass
+
+    def _StreamPipe(self, block_frames, overlap_frames, dtype):
+        """
+        A generator of float sample blocks that are read from the ffmpeg output stream as it is being decoded, so that
+        neither the whole file nor its decoded samples are ever held in memory.
+
+        Args:
+            block_frames -> int - The number of frames in each block.
+
+            overlap_frames -> int - The number of frames shared between consecutive blocks.
+
+            dtype -> np.dtype - The floating point type of the yielded blocks.
+
+        Return:
+            np.ndarray - Yields (num_channels, num_frames) float arrays, as described in StreamBlocks(...).
+        """
+        if type(self._file) is not str:
+            input_name = 'pipe:0'
+            stdin = subprocess.PIPE
+        else:
+            input_name = self._file
+            stdin = subprocess.DEVNULL
+        process = subprocess.Popen(self._FfmpegCommand(input_name, self.RAW),
+                                   stdin=stdin,
+                                   stdout=subprocess.PIPE)
+        if stdin == subprocess.PIPE:
+            # Feed ffmpeg from another thread so that it can never block waiting on us to read its output.
+            feeder = threading.Thread(target=self._FeedPipe, args=(process.stdin,), daemon=True)
+            feeder.start()
+
+        def read_frames(num_frames):
+            data = process.stdout.read(num_frames*self._fmt.frame_bytes)
+            data = np.frombuffer(data, dtype=self._fmt.SampleDtype())
+            return data.reshape((-1, self._fmt.n_channels)).T
+
+        try:
+            yield from self._StreamBlocks(read_frames, block_frames, overlap_frames, dtype)
+        finally:
+            process.stdout.close()
+            if process.poll() is None:
+                process.kill()
+            process.wait()
+            if stdin == subprocess.PIPE:
+                feeder.join()
+
+    def _WavSamples(self, start_seconds, duration):
+        """
+        Gets the requested window of samples when decoding via temporary wav files. If the whole file has already been
+        converted, that conversion is reused, otherwise only the requested window is decoded.
+
+        Args:
+            start_seconds -> float - The time in seconds of the first sample to be read.
+
+            duration -> float - The number of seconds of audio to be read. If None, all samples up until the end of the
+            file are to be read.
+
+        Return:
+            np.ndarray - A (num_channels, num_frames) array of the requested samples, as decoded.
+        """
+        if not self._temp_file and (start_seconds or duration is not None):
+            # The window's temporary file is deleted on leaving this block, so copy the samples out of it.
+            with self._DecodeToWav(start_seconds, duration) as wav_file:
+                return np.array(WavMemmapRead(wav_file.name).samples)
+
+        if not self._temp_file:
+            self.ConvertFile()
+
+        # At this stage the wav file is just memory mapped each time it is needed, this should be pretty light weight.
+        return WavMemmapRead(self._temp_filename).ReadSamplesInt(start_seconds, duration)
+
+    def _ReadSamples(self, start_seconds, duration):
+        """
+        Gets the requested window of samples, as decoded, in whichever way this object is configured to decode.
+
+        Args:
+            start_seconds -> float - The time in seconds of the first sample to be read.
+
+            duration -> float - The number of seconds of audio to be read. If None, all samples up until the end of the
+            file are to be read.
+
+        Return:
+            np.ndarray - A (num_channels, num_frames) array of the requested samples, as decoded.
+        """
+        if self._UsesSamples():
+            return self._Samples(start_seconds, duration)
+        return self._WavSamples(start_seconds, duration)
+
     def SaveWav(self, directory, filename=None):
         """
         Copies the MP3 data into a local wav file as specified by directory and filename.
@@ -105,7 +631,7 @@ class Mp3Read(AudioRead):
         # TODO [matthew.mccallum 06.09.18]: This currently assumes the file the class is configured with and the
         # provided arguments are strings. I should generalize this to file streams so that it can be saved on NFS,
         # or S3 for example.
-        if not self._temp_file:
+        if not self._UsesSamples() and not self._temp_file:
             self.ConvertFile()
 
         if filename is None:
@@ -118,22 +644,31 @@ class Mp3Read(AudioRead):
 
         save_filename = os.path.join(directory, os.path.splitext(os.path.basename(filename))[0]+".wav")
 
-        shutil.copy(self._temp_filename, save_filename)
+        if self._UsesSamples():
+            samples = self._Samples(0.0, None)
+            with open(save_filename, 'wb') as wav_file:
+                wav_file.write(self._fmt.WavHeader(samples.shape[1]))
+                wav_file.write(np.ascontiguousarray(samples.T).tobytes())
+        else:
+            shutil.copy(self._temp_filename, save_filename)
 
-    def ReadSamplesFloat(self):
+    def ReadSamplesFloat(self, start_seconds=0.0, duration=None, dtype=np.float64):
         """
-        Reads all samples from the wav file as floats in the range -1.0 <= sample <= 1.0.
+        Reads samples from the wav file as floats in the range -1.0 <= sample <= 1.0.
         This replaces any previous data read from the wav file.
 
+        Args:
+            start_seconds -> float - The time in seconds of the first sample to read.
+
+            duration -> float - The number of seconds of audio to read. If None, all samples up until the end of the
+            file are read.
+
+            dtype -> np.dtype - The floating point type of the returned samples, e.g., np.float32 to halve memory use.
+
         Return:
             np.ndarray - An array of dimensions (num_channels, num_frames) containing float valued audio samples.
         """
-        if not self._temp_file:
-            self.ConvertFile()
-
-        # At this stage the wav file is just opened each time it is needed, this should be pretty light weight.
-        wav_file = WavRead(self._temp_file)
-        self._data = wav_file.ReadSamplesFloat()
+        self._data = self._fmt.IntToFloat(self._ReadSamples(start_seconds, duration), dtype=dtype)
         return self._data
 
     def ReadSamplesInterleavedInt(self):
@@ -144,14 +679,53 @@ class Mp3Read(AudioRead):
         Return:
             list(int) - A list of interleaved samples from the audio file.
         """
-        if not self._temp_file:
-            self.ConvertFile()
+        self._data = self._ReadSamples(0.0, None).T.ravel().tolist()
+        return self._data
+
+    def ReadSamplesInt(self, start_seconds=0.0, duration=None):
+        """
+        Reads samples as integers, exactly as they are decoded, without any conversion. Note that for float sample
+        formats, the samples are floats.
+        This replaces any previous data read from file.
+
+        Args:
+            start_seconds -> float - The time in seconds of the first sample to read.
+
+            duration -> float - The number of seconds of audio to read. If None, all samples up until the end of the
+            file are read.
 
-        # At this stage the wav file is just opened each time it is needed, this should be pretty light weight.
-        wav_file = WavRead(self._temp_file)
-        self._data = wav_file.ReadSamplesInterleavedInt()
+        Return:
+            np.ndarray - A read-only array of dimensions (num_channels, num_frames) containing integer audio samples.
+        """
+        self._data = self._ReadSamples(start_seconds, duration)
         return self._data
 
+    def StreamBlocks(self, block_frames, overlap_frames=0, dtype=np.float64):
+        """
+        A generator that reads the decoded audio sequentially in blocks of float samples, so that long files may be
+        processed with bounded memory. This does not change the data property.
+
+        Args:
+            block_frames -> int - The number of frames in each block.
+
+            overlap_frames -> int - The number of frames shared between the end of each block and the start of the
+            next. Must be less than block_frames.
+
+            dtype -> np.dtype - The floating point type of the yielded blocks.
+
+        Return:
+            np.ndarray - Yields arrays of dimensions (num_channels, block_frames) containing float valued audio
+            samples, each starting block_frames - overlap_frames after the last. The final block may be shorter.
+            Note: the same buffer is reused for every block, so copy anything that is needed beyond the next
+            iteration.
+        """
+        if self._decode_mode == self.DECODE_PIPE and self._samples is None and self._decode_cache is None:
+            yield from self._StreamPipe(block_frames, overlap_frames, dtype)
+            return
+
+        # Unless decoding via pipes without a cache, the samples are memory mapped, so this is still bounded in memory.
+        yield from self._StreamArray(self._ReadSamples(0.0, None), block_frames, overlap_frames, dtype)
+
     @property
     def data(self):
         """
@@ -170,9 +744,12 @@ class Mp3Read(AudioRead):
         Return:
             float - The duration of the audio file in seconds.
         """
-        if self._temp_file:
+        if self._samples is not None:
+            # Get the audio length from the decoded samples (more accurate)
+            return self._samples.shape[1]/self._fmt.samp_rate
+        elif self._temp_file:
             # Get the audio length from the wav file (more accurate)
-            return WavRead(self._temp_filename).audio_length
+            return WavMemmapRead(self._temp_filename).audio_length
         else:
             # Get the audio length from the mp3 file (more efficient)
             # TODO [matthew.mccallum 04.11.18]: Test the below length getting with a BufferedIOBase derived object.
@@ -3,7 +3,7 @@ Created 12-26-17 by Matthew C. McCallum
 """
 
 # Local modules
-# None.
+from .fft_backend import *
 
 # Thirdparty modules
 import numpy as np
@@ -18,7 +18,16 @@ class Spectrogram( object ):
     Class for analyzing the spectrogram of a signal.
     """
 
-    def __init__( self, window, fft_size, overlap, num_frames=0 ):
+    COMPLEX_STORAGE = 'complex'
+    MAGNITUDE_STORAGE = 'magnitude'
+    LOG_MAGNITUDE_STORAGE = 'log_magnitude'
+    MAGNITUDE_PHASE_STORAGE = 'magnitude_phase'
+
+    # Phase in [-pi, pi] is quantized over the full range of an int16.
+    PHASE_SCALE = np.iinfo( np.int16 ).max/np.pi
+
+    def __init__( self, window, fft_size, overlap, num_frames=0, dtype=np.float64, one_sided=False, fft_backend=None,
+                  storage=COMPLEX_STORAGE ):
         """
         Constructor.
 
@@ -29,16 +38,42 @@ class Spectrogram( object ):
             fft_size -> int - The number of DFT bins to analyze.
 
             overlap -> float - A percentage overlap between successive frames.
+
+            dtype -> np.dtype - The floating point precision of analysis and synthesis. With np.float32 the
+            spectrogram is complex64, halving its memory relative to the default complex128.
+
+            one_sided -> bool - Whether to only hold the fft_size//2 + 1 non-negative frequency bins, as with an rfft.
+            For real signals the remaining bins are redundant complex conjugates, so this halves memory and
+            transform time, and synthesis uses an irfft.
+
+            fft_backend -> FFTBackend or str - The FFT backend for this spectrogram, see fft_backend.py. If None, the
+            global backend is used.
+
+            storage -> str - How the spectrogram is held in memory, one of:
+                COMPLEX_STORAGE - The complex spectrogram, of the complex type of dtype.
+                MAGNITUDE_STORAGE - Only the float32 magnitude, synthesised with zero phase.
+                LOG_MAGNITUDE_STORAGE - Only the float16 natural log of the magnitude, synthesised with zero phase.
+                MAGNITUDE_PHASE_STORAGE - The float32 magnitude and the phase quantized to an int16.
+            Compact modes take a quarter or less of the memory of a complex128 spectrogram, and are converted back to
+            complex whenever the complex spectrogram is needed, e.g., for the spec property or synthesis.
         """
-        self._window = window
+        if storage not in ( self.COMPLEX_STORAGE, self.MAGNITUDE_STORAGE, self.LOG_MAGNITUDE_STORAGE,
+                            self.MAGNITUDE_PHASE_STORAGE ):
+            raise ValueError( 'Unknown spectrogram storage: {0}'.format( storage ) )
+        self._dtype = np.dtype( dtype )
+        self._complex_dtype = np.result_type( self._dtype, np.complex64 )
+        self._window = np.asarray( window, dtype=self._dtype )
         self._fft_size = fft_size
         self._overlap = overlap
         self._win_len = len( self._window )
         self._frame_inc = int( ( 1 - self._overlap )*self._win_len )
         self._num_frames = num_frames
-        self._spec = np.zeros( (fft_size, num_frames), dtype='complex' )
+        self._one_sided = one_sided
+        self._fft_backend = None if fft_backend is None else GetFFTBackend( fft_backend )
+        self._storage = storage
+        self._spec = self._Compact( np.zeros( (self.num_bins, num_frames), dtype=self._complex_dtype ) )
 
-    def Analyze( self, signal ):
+    def Analyze( self, signal, out=None ):
         """
         Analyze a given signal from start to finish. The first index of the first analysis
         window will align with the first sample of signal, and the final window will be the
@@ -46,36 +81,303 @@ class Spectrogram( object ):
         the current windowing size / overlap configuration.
 
         Args:
-            signal -> np.ndarray - A 1D array containing the signal to be analyzed.
+            signal -> np.ndarray - A 1D array containing the signal to be analyzed, or a (batch, num_samples) array
+            of equal length signals, e.g., the channels of an audio file, to be analyzed together in a single
+            batched FFT. The spectrogram is then of dimensions (batch, num_bins, num_frames).
+
+            out -> np.ndarray - An optional array of the spectrogram's shape and storage type to analyze into, rather
+            than allocating a new one, e.g., the data of this spectrogram after analyzing a signal of the same length.
+            The spectrogram then holds this array.
+        """
+        signal = np.ascontiguousarray( signal, dtype=self._dtype )
+        self._num_frames = max( math.floor( ( signal.shape[-1] - self._win_len )/self._frame_inc ) + 1, 0 )
+        if out is not None:
+            self._CheckOut( out, signal.shape[:-1] + ( self.num_bins, self._num_frames ), self._storage_dtype )
+
+        # Window every frame in a single broadcast multiply over a strided view, without copying the frames first.
+        windowed = self._Frames( signal )*self._window
+
+        # For a real signal, only the non-negative frequencies need to be transformed, the remaining bins are their
+        # complex conjugates. Frames are transformed along rows, so that each transform is over contiguous memory.
+        half_spec = GetFFTBackend( self._fft_backend ).Rfft( windowed, self._fft_size, axis=-1 )
+        complex_out = out if self._storage == self.COMPLEX_STORAGE else None
+        if self._one_sided and complex_out is None:
+            spec = half_spec.astype( self._complex_dtype, copy=False )
+        else:
+            if complex_out is None:
+                spec = np.empty( half_spec.shape[:-1] + ( self._fft_size, ), dtype=self._complex_dtype )
+            else:
+                spec = np.swapaxes( complex_out, -1, -2 )
+            num_half_bins = half_spec.shape[-1]
+            spec[...,:num_half_bins] = half_spec
+            if not self._one_sided:
+                np.conjugate( half_spec[...,(self._fft_size - num_half_bins):0:-1], out=spec[...,num_half_bins:] )
+        spec = np.swapaxes( spec, -1, -2 )
+        self._spec = spec if complex_out is not None else self._Compact( spec, out )
+
+    def _Compact( self, spec, out=None ):
+        """
+        Convert a complex spectrogram to this spectrogram's storage type.
+
+        Args:
+            spec -> np.ndarray - The complex spectrogram data.
+
+            out -> np.ndarray - An optional array of the storage type to write the result into.
+
+        Return:
+            np.ndarray - The spectrogram data in its storage type. For complex storage with no out array, this is spec
+            itself.
+        """
+        if self._storage == self.COMPLEX_STORAGE and out is None:
+            return spec
+        if out is None:
+            out = np.empty( spec.shape, dtype=self._storage_dtype )
+        if self._storage == self.COMPLEX_STORAGE:
+            np.copyto( out, spec )
+        elif self._storage == self.MAGNITUDE_STORAGE:
+            np.abs( spec, out=out )
+        elif self._storage == self.LOG_MAGNITUDE_STORAGE:
+            with np.errstate( divide='ignore' ):
+                np.log( np.abs( spec ), out=out )
+        else:
+            np.abs( spec, out=out['magnitude'] )
+            out['phase'] = np.rint( np.angle( spec )*self.PHASE_SCALE )
+        return out
+
+    def _Expand( self, data ):
+        """
+        Convert spectrogram data in this spectrogram's storage type back to a complex spectrogram.
+
+        Args:
+            data -> np.ndarray - The spectrogram data in its storage type.
+
+        Return:
+            np.ndarray - The complex spectrogram data. For complex storage, this is data itself.
+        """
+        if self._storage == self.COMPLEX_STORAGE:
+            return data
+        if self._storage == self.MAGNITUDE_STORAGE:
+            return data.astype( self._complex_dtype )
+        if self._storage == self.LOG_MAGNITUDE_STORAGE:
+            return np.exp( data.astype( self._dtype ) ).astype( self._complex_dtype )
+        phase = data['phase'].astype( self._dtype )/self._dtype.type( self.PHASE_SCALE )
+        return ( data['magnitude']*np.exp( 1j*phase ) ).astype( self._complex_dtype, copy=False )
+
+    @staticmethod
+    def _CheckOut( out, shape, dtype ):
+        """
+        Make sure an output buffer is of the shape and type to be written into it.
+
+        Args:
+            out -> np.ndarray - The output buffer.
+
+            shape -> tuple(int) - The shape of the data to be written.
+
+            dtype -> np.dtype - The type of the data to be written.
+        """
+        if out.shape != shape or out.dtype != dtype:
+            raise ValueError( 'Output buffer of shape {0} and type {1} does not match the output, of shape {2} and '
+                              'type {3}.'.format( out.shape, out.dtype, shape, np.dtype( dtype ) ) )
+
+    def _Frames( self, signal ):
+        """
+        Get a read-only view on all complete analysis frames in a signal, without copying it.
+
+        Args:
+            signal -> np.ndarray - A contiguous array containing the signal to be framed along its last axis.
+
+        Return:
+            np.ndarray - A (..., num_frames, win_len) strided view on signal, with each row being one analysis frame.
         """
-        self._num_frames = math.floor( ( len( signal ) - self._win_len )/self._frame_inc ) + 1
-        frame_indices = np.arange( self._num_frames, dtype='int32' )
-        freq_indices = np.arange( self._win_len, dtype='int32' )
-        spec_indices = np.add( *np.meshgrid( frame_indices*self._frame_inc, freq_indices ) )
-        self._spec = np.fft.fft( np.dot( np.diag( self._window ), signal[spec_indices] ), self._fft_size, axis=0 )
+        sample_stride = signal.strides[-1]
+        return np.lib.stride_tricks.as_strided( signal,
+                                                shape=signal.shape[:-1] + ( self._num_frames, self._win_len ),
+                                                strides=signal.strides[:-1] + ( sample_stride*self._frame_inc,
+                                                                                sample_stride ),
+                                                writeable=False )
 
-    def Synthesise( self ):
+    def Synthesise( self, window=None, normalise=False, out=None ):
         """
-        Synthesise the spectrogram as a 1D real signal using the overlap-add method with no synthesis windowing.
+        Synthesise the spectrogram as a 1D real signal using the overlap-add method, by default with no synthesis
+        windowing.
+
+        Args:
+            window -> np.ndarray - An optional 1D array of the same length as the analysis window, containing a
+            windowing function applied to each frame before it is overlap-added.
+
+            normalise -> bool - Whether to divide the output by the overlap-added product of the analysis and
+            synthesis windows, so that an unmodified spectrogram reconstructs the analyzed signal exactly wherever
+            that sum is non-zero.
+
+            out -> np.ndarray - An optional array of the output's shape and of the spectrogram's floating point
+            type to synthesise into, rather than allocating a new one, e.g., the output of a previous synthesis of a
+            spectrogram of the same length.
 
         Return:
-            np.ndarray 1D - The synthesised signal using overlap-add.
-        """
-        output_sig = np.zeros( ( 1, self._num_frames*self._frame_inc + self._win_len ) )
-        time_windows = np.fft.ifft( self._spec, axis=0 )
-        time_windows = time_windows[:self._win_len,:]
-        time_windows = np.real( time_windows )
-        for win_num in range( self._num_frames ):
-            output_sig[0,(win_num*self._frame_inc):(win_num*self._frame_inc+self._win_len)] += time_windows[:,win_num]
+            np.ndarray - The synthesised signal using overlap-add, of dimensions (1, num_samples), or
+            (batch, num_samples) for a batch of spectrograms.
+        """
+        num_frames = self._spec.shape[-1]
+        batch_shape = self._spec.shape[:-2] or ( 1, )
+        output_shape = batch_shape + ( num_frames*self._frame_inc + self._win_len, )
+        if out is None:
+            output_sig = np.zeros( output_shape, dtype=self._dtype )
+        else:
+            self._CheckOut( out, output_shape, self._dtype )
+            output_sig = out
+            output_sig.fill( 0.0 )
+        # Frames are transformed along rows, so that each frame is contiguous for the overlap-add.
+        frames_spec = np.swapaxes( self.spec, -1, -2 )
+        fft_backend = GetFFTBackend( self._fft_backend )
+        if self._one_sided:
+            time_windows = fft_backend.Irfft( frames_spec, self._fft_size, axis=-1 )
+        else:
+            time_windows = np.real( fft_backend.Ifft( frames_spec, axis=-1 ) )
+        time_windows = time_windows[...,:self._win_len]
+        if window is not None:
+            # The inverse transform is a new array, so it may be windowed in place.
+            time_windows *= window[:time_windows.shape[-1]]
+        self._OverlapAdd( time_windows, output_sig )
+
+        if normalise:
+            self.Normalise( output_sig, self.WindowSum( num_frames, window ) )
+
         return output_sig
 
+    def WindowSum( self, num_frames, window=None ):
+        """
+        Get the overlap-added product of the analysis and synthesis windows, by which a synthesised signal is
+        divided for exact reconstruction.
+
+        Args:
+            num_frames -> int - The number of frames overlap-added.
+
+            window -> np.ndarray - The synthesis window, or None if frames are not windowed in synthesis.
+
+        Return:
+            np.ndarray 1D - The window sum, of the same length as the output of Synthesise(...).
+        """
+        window_sum = np.zeros( num_frames*self._frame_inc + self._win_len, dtype=self._dtype )
+        frame_window = self._window if window is None else self._window*window
+        self._OverlapAdd( np.broadcast_to( frame_window, ( num_frames, self._win_len ) ), window_sum )
+        return window_sum
+
+    @staticmethod
+    def Normalise( signal, window_sum ):
+        """
+        Divide a synthesised signal in place by its window sum, wherever that sum is non-zero.
+
+        Args:
+            signal -> np.ndarray - A synthesised signal, or a batch of signals along its first axis.
+
+            window_sum -> np.ndarray - A 1D array of the same length as signal, as from WindowSum(...).
+        """
+        nonzero = window_sum > np.finfo( signal.dtype ).tiny
+        np.divide( signal, window_sum, out=signal, where=nonzero )
+
+    def _OverlapAdd( self, frames, output_sig ):
+        """
+        Overlap-adds frames spaced frame_inc samples apart, in bulk. Each frame is split into consecutive blocks of
+        frame_inc samples, and the k-th block of every frame is added to the output at once, as a single array of
+        contiguous hop length blocks offset by k hops. This takes as many vectorized additions as there are frames
+        overlapping any one sample, rather than one per frame.
+
+        Args:
+            frames -> np.ndarray - A (..., num_frames, frame_len) array of frames to be overlap-added.
+
+            output_sig -> np.ndarray - A (..., num_samples) array of at least (num_frames - 1)*frame_inc + frame_len
+            samples to add the frames into.
+        """
+        num_frames, frame_len = frames.shape[-2:]
+        hop = self._frame_inc
+        num_blocks = -( -frame_len//hop )
+        # Zero pad the frames up to a whole number of blocks, unless they already are.
+        if num_blocks*hop != frame_len:
+            padded = np.zeros( frames.shape[:-1] + ( num_blocks*hop, ), dtype=frames.dtype )
+            padded[...,:frame_len] = frames
+            frames = padded
+        sample_stride = output_sig.strides[-1]
+        for block in range( num_blocks ):
+            # A writable view of consecutive hop length blocks of the output, starting block hops in.
+            output_blocks = np.lib.stride_tricks.as_strided( output_sig[...,(block*hop):],
+                                                             shape=output_sig.shape[:-1] + ( num_frames, hop ),
+                                                             strides=output_sig.strides[:-1] + ( sample_stride*hop,
+                                                                                                 sample_stride ) )
+            output_blocks += frames[...,(block*hop):((block + 1)*hop)]
+
     @property
     def spec( self ):
         """
-        np.ndarray - A 2D array containing the complex spectrogram of the last input signal to be analyzed.
+        np.ndarray - A (num_bins, num_frames) array containing the complex spectrogram of the last input signal to be
+        analyzed, or a (batch, num_bins, num_frames) array for a batch of signals. For compact storage, this is
+        converted from the stored data on each access.
+        """
+        return self._Expand( self._spec )
+
+    @property
+    def data( self ):
+        """
+        np.ndarray - The spectrogram as it is held in memory, of the same dimensions as spec, see the storage
+        argument to the constructor. For magnitude and phase storage, this is a structured array with 'magnitude' and
+        'phase' fields.
         """
         return self._spec
 
+    @property
+    def magnitude( self ):
+        """
+        np.ndarray - The magnitude of the spectrogram, of the same dimensions as spec.
+        """
+        if self._storage == self.MAGNITUDE_STORAGE:
+            return self._spec
+        if self._storage == self.LOG_MAGNITUDE_STORAGE:
+            return np.exp( self._spec.astype( self._dtype ) )
+        if self._storage == self.MAGNITUDE_PHASE_STORAGE:
+            return self._spec['magnitude']
+        return np.abs( self._spec )
+
+    @property
+    def storage( self ):
+        """
+        str - How the spectrogram is held in memory, see the constructor.
+        """
+        return self._storage
+
+    @property
+    def _storage_dtype( self ):
+        """
+        np.dtype - The type of the spectrogram data as it is held in memory.
+        """
+        if self._storage == self.MAGNITUDE_STORAGE:
+            return np.dtype( np.float32 )
+        if self._storage == self.LOG_MAGNITUDE_STORAGE:
+            return np.dtype( np.float16 )
+        if self._storage == self.MAGNITUDE_PHASE_STORAGE:
+            return np.dtype( [ ( 'magnitude', np.float32 ), ( 'phase', np.int16 ) ] )
+        return self._complex_dtype
+
+    @property
+    def dtype( self ):
+        """
+        np.dtype - The floating point precision of analysis and synthesis. The spectrogram itself is of the complex
+        type of the same precision.
+        """
+        return self._dtype
+
+    @property
+    def one_sided( self ):
+        """
+        bool - Whether only the non-negative frequency bins are held, see the constructor.
+        """
+        return self._one_sided
+
+    @property
+    def num_bins( self ):
+        """
+        int - The number of frequency bins held for each frame, i.e., fft_size, or fft_size//2 + 1 if one sided.
+        """
+        return self._fft_size//2 + 1 if self._one_sided else self._fft_size
+
     @property
     def frame_inc( self ):
         """
@@ -85,13 +387,13 @@ class Spectrogram( object ):
 
     def __getitem__( self, item ):
         """
-        Item getter for getting spectrogram slices.
+        Item getter for getting spectrogram slices. Items index frames, across every spectrogram of a batch.
 
         Return:
             Spectrogram - The spectrogram containing a view on the requested subset of data.
         """
         new_spec = copy.copy( self )
-        new_spec._spec = self._spec[:,item]
+        new_spec._spec = self._spec[...,item]
         return new_spec
 
     def __setitem__( self, idx, value ):
@@ -99,16 +401,18 @@ class Spectrogram( object ):
         Item setter for setting spectrogram subsets.
 
         Args:
-            idx - int, slice, range - The frames which to update.
+            idx - int, slice, range - The frames which to update, in every spectrogram of a batch.
 
-            value - Spectrogram or np.ndarray - The data to update the spectrogram with.
+            value - Spectrogram or np.ndarray - The data to update the spectrogram with, an array being complex
+            spectrogram data.
         """
         # TODO [matthew.mccallum 01.07.17]: This conditional below is a bit slow for simply setting an item, but since
         # functools.singledispatch only helps with type inference on the first argument, we're stuck with it for now.
         if isinstance( value, np.ndarray ):
-            self._spec[:,idx] = value
+            self._spec[...,idx] = self._Compact( value )
         elif isinstance( value, Spectrogram ):
-            self._spec[:,idx] = value.spec
+            self._CheckCompatible( value )
+            self._spec[...,idx] = value.data if value.storage == self._storage else self._Compact( value.spec )
         else:
             raise TypeError
 
@@ -117,13 +421,15 @@ class Spectrogram( object ):
         Add this spectrogram data to another via complex addition.
 
         Args:
-            other -> Spectrogram - A spectrogram of equal size containing values to be added to this spectrogram.
+            other -> Spectrogram - A spectrogram of equal size containing values to be added to this spectrogram. A
+            single spectrogram is broadcast across every spectrogram of a batch.
 
         Return:
             Spectrogram - A new spectrogram object containing the resulting data.
         """
+        self._CheckCompatible( other )
         new_spec = copy.copy( self )
-        new_spec._spec = self._spec + other.spec
+        new_spec._spec = self._Compact( self.spec + other.spec )
         return new_spec
 
     def __sub__( self, other ):
@@ -132,14 +438,111 @@ class Spectrogram( object ):
 
         Args:
             other -> Spectrogram - A spectrogram of equal size containing values to be subtracted from this spectrogram.
+            A single spectrogram is broadcast across every spectrogram of a batch.
 
         Return:
             Spectrogram - A new spectrogram object containing the resulting data.
         """
+        self._CheckCompatible( other )
         new_spec = copy.copy( self )
-        new_spec._spec = self._spec - other.spec
+        new_spec._spec = self._Compact( self.spec - other.spec )
         return new_spec
 
+    def __iadd__( self, other ):
+        """
+        Add another spectrogram to this one in place, without allocating a new spectrogram. Note that slices of a
+        spectrogram are views, so adding to a slice also updates the spectrogram it was sliced from.
+
+        Args:
+            other -> Spectrogram - A spectrogram of equal size containing values to be added to this spectrogram. A
+            single spectrogram is broadcast across every spectrogram of a batch.
+
+        Return:
+            Spectrogram - This spectrogram.
+        """
+        self._CheckCompatible( other )
+        if self._storage == self.COMPLEX_STORAGE:
+            self._spec += other.spec
+        else:
+            self._Compact( self.spec + other.spec, out=self._spec )
+        return self
+
+    def __isub__( self, other ):
+        """
+        Subtract another spectrogram from this one in place, without allocating a new spectrogram.
+
+        Args:
+            other -> Spectrogram - A spectrogram of equal size containing values to be subtracted from this spectrogram.
+            A single spectrogram is broadcast across every spectrogram of a batch.
+
+        Return:
+            Spectrogram - This spectrogram.
+        """
+        self._CheckCompatible( other )
+        if self._storage == self.COMPLEX_STORAGE:
+            self._spec -= other.spec
+        else:
+            self._Compact( self.spec - other.spec, out=self._spec )
+        return self
+
+    def __mul__( self, mask ):
+        """
+        Multiply this spectrogram by a mask, see ApplyMask(...).
+
+        Return:
+            Spectrogram - A new spectrogram object containing the resulting data.
+        """
+        return self.ApplyMask( mask )
+
+    def __imul__( self, mask ):
+        """
+        Multiply this spectrogram by a mask in place, without allocating a new spectrogram, see ApplyMask(...).
+
+        Return:
+            Spectrogram - This spectrogram.
+        """
+        return self.ApplyMask( mask, out=self )
+
+    def ApplyMask( self, mask, out=None ):
+        """
+        Multiply this spectrogram by a mask, e.g., a real valued time-frequency mask separating one source from a
+        mixture.
+
+        Args:
+            mask -> np.ndarray, Spectrogram or float - A (num_bins, num_frames) array, or any array broadcastable to
+            the spectrogram, a spectrogram of equal size, or a scalar gain, to multiply the spectrogram by.
+
+            out -> Spectrogram - An optional spectrogram of equal size to write the result into, rather than
+            allocating a new one, e.g., the output of a previous call for a spectrogram of the same length, or this
+            spectrogram itself to mask it in place.
+
+        Return:
+            Spectrogram - The masked spectrogram, i.e., out if it was given.
+        """
+        if isinstance( mask, Spectrogram ):
+            self._CheckCompatible( mask )
+            mask = mask.spec
+        if out is None:
+            out = copy.copy( self )
+            out._spec = self._Compact( self.spec*mask )
+        elif self._storage == self.COMPLEX_STORAGE and out.storage == self.COMPLEX_STORAGE:
+            self._CheckCompatible( out )
+            np.multiply( self._spec, mask, out=out._spec )
+        else:
+            self._CheckCompatible( out )
+            out._Compact( self.spec*mask, out=out._spec )
+        return out
+
+    def _CheckCompatible( self, other ):
+        """
+        Make sure another spectrogram holds the same frequency bins as this one, so that their data may be combined.
+
+        Args:
+            other -> Spectrogram - The spectrogram to be combined with this one.
+        """
+        if other.one_sided != self._one_sided:
+            raise ValueError( 'Cannot combine one sided and two sided spectrograms.' )
+
     def __len__( self ):
         """
         Get the number of frames in this spectrogram.
@@ -147,5 +550,5 @@ class Spectrogram( object ):
         Return:
             int - The number of frames in this spectrogram.
         """
-        return self._spec.shape[1]
+        return self._spec.shape[-1]
 
@@ -0,0 +1,168 @@
+"""
+Created 10-17-26 by Matthew C. McCallum
+"""
+
+# Local modules
+from .spectrogram import *
+
+# Local submodules
+# None.
+
+# Thirdparty modules
+import numpy as np
+
+# Python library imports
+# None.
+
+
+class StreamingSpectrogram( object ):
+    """
+    Incrementally analyzes the spectrogram of a signal that arrives in chunks of any length, e.g., from live audio.
+    Samples that are not yet part of a complete frame are carried over to the next chunk, so that each frame is emitted
+    as soon as its last sample arrives, and the emitted frames are exactly those of analyzing the whole signal at once.
+    """
+
+    def __init__( self, window, fft_size, overlap, dtype=np.float64, one_sided=False, fft_backend=None,
+                  storage=Spectrogram.COMPLEX_STORAGE ):
+        """
+        Constructor.
+
+        Args:
+            window -> np.ndarray - A 1D array containing the windowing function for STFT analysis.
+
+            fft_size -> int - The number of DFT bins to analyze.
+
+            overlap -> float - A percentage overlap between successive frames.
+
+            dtype -> np.dtype - The floating point precision of analysis, see Spectrogram.
+
+            one_sided -> bool - Whether to only hold the non-negative frequency bins, see Spectrogram.
+
+            fft_backend -> FFTBackend or str - The FFT backend for analysis, see Spectrogram.
+
+            storage -> str - How the emitted spectrograms are held in memory, see Spectrogram.
+        """
+        self._spectrogram = Spectrogram( window, fft_size, overlap, dtype=dtype, one_sided=one_sided,
+                                         fft_backend=fft_backend, storage=storage )
+        self._tail = None
+        self._num_frames = 0
+
+    def Analyze( self, chunk ):
+        """
+        Analyze the next chunk of the signal.
+
+        Args:
+            chunk -> np.ndarray - A 1D array containing the samples following those of the last chunk analyzed, or a
+            (batch, num_samples) array of chunks of a batch of signals.
+
+        Return:
+            Spectrogram - A spectrogram containing only the frames completed by this chunk, which may be none.
+        """
+        signal = np.asarray( chunk, dtype=self._spectrogram.dtype )
+        if self._tail is not None:
+            signal = np.concatenate( ( self._tail, signal ), axis=-1 )
+        self._spectrogram.Analyze( signal )
+        num_frames = len( self._spectrogram )
+        # Copy the remainder so that the rest of the signal may be freed, this is always less than one window.
+        self._tail = signal[...,(num_frames*self._spectrogram.frame_inc):].copy()
+        self._num_frames += num_frames
+        return self._spectrogram[:]
+
+    def Reset( self ):
+        """
+        Discard any carried over samples, to start analyzing a new signal.
+        """
+        self._tail = None
+        self._num_frames = 0
+
+    @property
+    def frame_inc( self ):
+        """
+        int - The number of samples elapsed between the start of each consecutive window in analysis.
+        """
+        return self._spectrogram.frame_inc
+
+    @property
+    def num_frames( self ):
+        """
+        int - The total number of frames emitted since construction or the last reset.
+        """
+        return self._num_frames
+
+
+class StreamingOverlapAdd( object ):
+    """
+    Incrementally synthesises a signal from successive blocks of spectrogram frames, e.g., as emitted by a
+    StreamingSpectrogram, using the overlap-add method. Each call returns the samples that no later frame will
+    overlap, and holds back at most one window of partially summed samples.
+    """
+
+    def __init__( self, window=None, normalise=False ):
+        """
+        Constructor.
+
+        Args:
+            window -> np.ndarray - An optional synthesis window, see Spectrogram.Synthesise(...).
+
+            normalise -> bool - Whether to divide by the window sum, see Spectrogram.Synthesise(...).
+        """
+        self._window = window
+        self._normalise = normalise
+        self._pending = None
+        self._pending_window_sum = None
+        self._pending_len = 0
+        # An empty output with the leading dimensions and type of the signal, e.g., (batch, 0) for a batch.
+        self._empty = np.zeros( 0 )
+
+    def Synthesise( self, spectrogram ):
+        """
+        Synthesise the next block of frames.
+
+        Args:
+            spectrogram -> Spectrogram - A spectrogram containing the frames following those of the last block.
+
+        Return:
+            np.ndarray - The completed output samples, one hop for every frame in the block. This is 1D, or of
+            dimensions (batch, num_samples) for a batch of spectrograms.
+        """
+        num_frames = len( spectrogram )
+        output_sig = spectrogram.Synthesise( window=self._window )
+        if spectrogram.data.ndim == 2:
+            output_sig = output_sig[0]
+        self._empty = np.zeros( output_sig.shape[:-1] + ( 0, ), dtype=output_sig.dtype )
+        if not num_frames:
+            return output_sig[...,:0]
+
+        if self._pending is not None:
+            output_sig[...,:self._pending.shape[-1]] += self._pending
+        num_complete = num_frames*spectrogram.frame_inc
+        self._pending = output_sig[...,num_complete:].copy()
+        self._pending_len = max( self._pending.shape[-1] - spectrogram.frame_inc, 0 )
+        output_sig = output_sig[...,:num_complete]
+
+        if self._normalise:
+            window_sum = spectrogram.WindowSum( num_frames, self._window )
+            if self._pending_window_sum is not None:
+                window_sum[:len( self._pending_window_sum )] += self._pending_window_sum
+            self._pending_window_sum = window_sum[num_complete:].copy()
+            Spectrogram.Normalise( output_sig, window_sum[:num_complete] )
+
+        return output_sig
+
+    def Flush( self ):
+        """
+        Get the remaining samples, overlapped only by the frames synthesised so far, at the end of the signal. This
+        also resets the synthesiser to start a new signal.
+
+        Return:
+            np.ndarray - The remaining output samples, up to the end of the last frame.
+        """
+        if self._pending is None:
+            return self._empty.copy()
+        output_sig = self._pending[...,:self._pending_len]
+        if self._normalise:
+            Spectrogram.Normalise( output_sig, self._pending_window_sum[:self._pending_len] )
+        self._pending = None
+        self._pending_window_sum = None
+        self._pending_len = 0
+        return output_sig
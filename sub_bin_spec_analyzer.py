@@ -2,6 +2,8 @@
 Created 12-26-17 by Matthew C. McCallum
 """
 
+from .fft_backend import *
+
 import numpy as np
 
 
@@ -11,7 +13,7 @@ class SubBinSpecAnalyzer( object ):
     a spectrogram.
     """
 
-    def __init__( self, fft_size, window, resolution_mult ):
+    def __init__( self, fft_size, window, resolution_mult, fft_backend=None ):
         """
         Constructor.
 
@@ -25,8 +27,11 @@ class SubBinSpecAnalyzer( object ):
             resolution_mult -> int - The number of intervals between each STFT bin that this
             class uses as a lookup table to re-estimate magnitudes and phases. The higher this
             number is the more accurate it is to a point.
+
+            fft_backend -> FFTBackend or str - The FFT backend to use, see fft_backend.py. If None, the global
+            backend is used.
         """
-        sub_bin_spec = np.fft.fft( window, fft_size*resolution_mult );
+        sub_bin_spec = GetFFTBackend( fft_backend ).Fft( window, fft_size*resolution_mult );
         self._subbin_resolution = resolution_mult
         self._subbin_mag = np.abs( sub_bin_spec )
         self._subbin_mag = np.concatenate( ( self._subbin_mag[:resolution_mult], self._subbin_mag[-resolution_mult:] ) )
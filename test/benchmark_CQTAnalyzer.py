@@ -0,0 +1,47 @@
+"""
+Created 10-17-26 by Matthew C. McCallum
+"""
+
+
+# Local imports
+from sigtools import CQTAnalyzer
+
+# Third party imports
+import numpy as np
+
+# Python standard library imports
+import timeit
+import os
+
+
+def Benchmark(signal_seconds=60.0, samp_rate=44100, octaves=8, n_jobs=(1, 2, 4, 8), repeats=3):
+    """
+    Prints the time taken to analyze a signal with the recursive CQT, computing its octaves with a range of numbers
+    of threads.
+
+    Args:
+        signal_seconds -> float - The length of the analyzed signal in seconds.
+
+        samp_rate -> int - The sampling rate of the analyzed signal in Hz.
+
+        octaves -> int - The number of octaves analyzed, each of which is a separate response computed in parallel.
+
+        n_jobs -> tuple(int) - The numbers of threads to benchmark, those over the number of CPUs are skipped.
+
+        repeats -> int - The number of times each analysis is timed, the fastest of which is reported.
+    """
+    signal = np.random.RandomState(0).uniform(-0.5, 0.5, int(signal_seconds*samp_rate))
+    print('{0:>8} {1:>12} {2:>8}'.format('n_jobs', 'time (s)', 'speedup'))
+    serial_time = None
+    for jobs in n_jobs:
+        if jobs > (os.cpu_count() or 1):
+            continue
+        analyzer = CQTAnalyzer(12, octaves, 32.7, 0.01, samp_rate=samp_rate, n_jobs=jobs)
+        analyzer.Analyze(signal[:samp_rate], 0) # Build the filter bases outside of the timing.
+        this_time = min(timeit.repeat(lambda: analyzer.Analyze(signal, 0), number=1, repeat=repeats))
+        serial_time = serial_time or this_time
+        print('{0:>8} {1:>12.4f} {2:>7.1f}x'.format(jobs, this_time, serial_time/this_time))
+
+
+if __name__ == '__main__':
+    Benchmark()
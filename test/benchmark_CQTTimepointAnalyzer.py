@@ -0,0 +1,62 @@
+"""
+Created 10-17-26 by Matthew C. McCallum
+"""
+
+
+# Local imports
+from sigtools import CQTTimepointAnalyzer
+from sigtools import GetFFTBackend
+
+# Third party imports
+import numpy as np
+
+# Python standard library imports
+import timeit
+
+
+def AnalyzeLists(analyzer, signal, time_points):
+    """
+    The original CQTTimepointAnalyzer.Analyze(...), which pads the whole signal, gathers each window into a Python list
+    and stacks them, then takes a complex FFT of every window at once, kept here as a baseline for comparison.
+    """
+    signal = np.pad(signal, pad_width=analyzer._window_size//2, mode='constant', constant_values=0.0)
+    time_inds = [int(point*analyzer._samp_rate) for point in time_points]
+    windows = [signal[start:(start+analyzer._window_size)].reshape((analyzer._window_size,1)) for start in time_inds]
+    windows = np.hstack(windows)
+    spec = GetFFTBackend(analyzer._fft_backend).Fft(windows, n=analyzer._n_fft, axis=0)[:(analyzer._n_fft // 2) + 1, :]
+    cqt = np.abs(analyzer._basis.dot(spec))
+    cqt *= np.sqrt(analyzer._filt_lengths[:, np.newaxis] / analyzer._n_fft)
+    return cqt
+
+
+def Benchmark(num_points=10000, signal_seconds=300.0, samp_rate=22050, octaves=6, min_freq=110.0, repeats=3):
+    """
+    Prints the time taken to analyze a signal at a number of random time points, e.g., onsets, with the original and
+    current CQTTimepointAnalyzer analysis.
+
+    Args:
+        num_points -> int - The number of time points analyzed.
+
+        signal_seconds -> float - The length of the analyzed signal in seconds.
+
+        samp_rate -> int - The sampling rate of the analyzed signal in Hz.
+
+        octaves -> int - The number of octaves analyzed.
+
+        min_freq -> float - The lowest analyzed frequency in Hz, which sets the window length. The original analysis
+        holds every window, and its complex FFT, in memory at once, so lower frequencies may need fewer points.
+
+        repeats -> int - The number of times each analysis is timed, the fastest of which is reported.
+    """
+    signal = np.random.RandomState(0).uniform(-0.5, 0.5, int(signal_seconds*samp_rate))
+    time_points = np.sort(np.random.RandomState(1).uniform(0.0, signal_seconds, num_points))
+    analyzer = CQTTimepointAnalyzer(samp_rate, 12, octaves, min_freq)
+    lists_time = min(timeit.repeat(lambda: AnalyzeLists(analyzer, signal, time_points), number=1, repeat=repeats))
+    current_time = min(timeit.repeat(lambda: analyzer.Analyze(signal, time_points), number=1, repeat=repeats))
+    print('{0:>8} {1:>8} {2:>14} {3:>14} {4:>8}'.format('points', 'window', 'original (s)', 'current (s)', 'speedup'))
+    print('{0:>8} {1:>8} {2:>14.4f} {3:>14.4f} {4:>7.1f}x'.format(num_points, analyzer._window_size, lists_time,
+                                                                 current_time, lists_time/current_time))
+
+
+if __name__ == '__main__':
+    Benchmark()
@@ -0,0 +1,94 @@
+"""
+Created 10-17-26 by Matthew C. McCallum
+"""
+
+
+# Local imports
+from sigtools import Spectrogram
+
+# Third party imports
+import numpy as np
+
+# Python standard library imports
+import timeit
+import math
+
+
+def AnalyzeDense(window, fft_size, frame_inc, signal):
+    """
+    The original Spectrogram.Analyze(...), which gathers a copy of every frame through a meshgrid index and windows
+    them with a dense diagonal matrix multiply, kept here as a baseline for comparison.
+    """
+    win_len = len(window)
+    num_frames = math.floor((len(signal) - win_len)/frame_inc) + 1
+    frame_indices = np.arange(num_frames, dtype='int32')
+    freq_indices = np.arange(win_len, dtype='int32')
+    spec_indices = np.add(*np.meshgrid(frame_indices*frame_inc, freq_indices))
+    return np.fft.fft(np.dot(np.diag(window), signal[spec_indices]), fft_size, axis=0)
+
+
+def OverlapAddLoop(time_windows, frame_inc):
+    """
+    The overlap-add in the original Spectrogram.Synthesise(), which adds one frame at a time in a Python loop, kept
+    here as a baseline for comparison.
+    """
+    num_frames, win_len = time_windows.shape
+    output_sig = np.zeros((1, num_frames*frame_inc + win_len))
+    for win_num in range(num_frames):
+        output_sig[0, (win_num*frame_inc):(win_num*frame_inc + win_len)] += time_windows[win_num, :]
+    return output_sig
+
+
+def OverlapAddBulk(spec, time_windows):
+    """
+    The overlap-add in the current Spectrogram.Synthesise(...).
+    """
+    num_frames, win_len = time_windows.shape
+    output_sig = np.zeros((1, num_frames*spec.frame_inc + win_len))
+    spec._OverlapAdd(time_windows, output_sig[0])
+    return output_sig
+
+
+def Benchmark(signal_seconds=60.0, samp_rate=44100, win_lens=(256, 512, 1024, 2048), overlap=0.75,
+              synthesis_overlap=0.9375, repeats=3):
+    """
+    Prints the time taken to analyze a signal with the original and current Spectrogram analysis, and to overlap-add
+    its frames with the original and current synthesis, at a range of window sizes.
+
+    Args:
+        signal_seconds -> float - The length of the analyzed signal in seconds.
+
+        samp_rate -> int - The sampling rate of the analyzed signal in Hz.
+
+        win_lens -> tuple(int) - The window lengths to benchmark, each analyzed with an FFT of twice its length.
+
+        overlap -> float - The overlap between successive frames for analysis.
+
+        synthesis_overlap -> float - The overlap between successive frames for synthesis. Small hops are where the
+        per-frame loop is slowest.
+
+        repeats -> int - The number of times each analysis is timed, the fastest of which is reported.
+    """
+    signal = np.random.RandomState(0).uniform(-0.5, 0.5, int(signal_seconds*samp_rate))
+    print('{0:>8} {1:>12} {2:>12} {3:>8}'.format('win_len', 'dense (s)', 'strided (s)', 'speedup'))
+    for win_len in win_lens:
+        spec = Spectrogram(np.hanning(win_len), 2*win_len, overlap)
+        dense_time = min(timeit.repeat(lambda: AnalyzeDense(spec._window, 2*win_len, spec.frame_inc, signal),
+                                       number=1,
+                                       repeat=repeats))
+        strided_time = min(timeit.repeat(lambda: spec.Analyze(signal), number=1, repeat=repeats))
+        print('{0:>8} {1:>12.4f} {2:>12.4f} {3:>7.1f}x'.format(win_len, dense_time, strided_time,
+                                                               dense_time/strided_time))
+
+    print('{0:>8} {1:>12} {2:>12} {3:>8}'.format('win_len', 'loop (s)', 'bulk (s)', 'speedup'))
+    for win_len in win_lens:
+        spec = Spectrogram(np.hanning(win_len), 2*win_len, synthesis_overlap)
+        spec.Analyze(signal)
+        time_windows = np.fft.irfft(spec.spec.T, axis=1)[:, :win_len]
+        loop_time = min(timeit.repeat(lambda: OverlapAddLoop(time_windows, spec.frame_inc), number=1, repeat=repeats))
+        bulk_time = min(timeit.repeat(lambda: OverlapAddBulk(spec, time_windows), number=1, repeat=repeats))
+        print('{0:>8} {1:>12.4f} {2:>12.4f} {3:>7.1f}x'.format(win_len, loop_time, bulk_time, loop_time/bulk_time))
+
+
+if __name__ == '__main__':
+    Benchmark()
@@ -5,13 +5,22 @@ Created 04-11-18 by Matthew C. McCallum
 
 # Local imports
 from sigtools import MakeAudioReader
+from sigtools import MakeAudioReaderBatch
+from sigtools import MakeAudioReaderAsync
+from sigtools import WavRead
+from sigtools import WavMemmapRead
+from sigtools import Mp3Read
+from sigtools import DecodeCache
 
 # Third party imports
+import numpy as np
 import matplotlib.pyplot as plt
 plt.ioff()
 
 # Python standard library imports
 import unittest
+import tempfile
+import asyncio
 import time
 
 
@@ -61,6 +70,188 @@ class TestAudioRead(unittest.TestCase):
         reader = MakeAudioReader(url)
         self.assertAlmostEqual(reader.audio_length, 9.137, places=3) # Check the correct length is retrieved.
 
+    def test_wav_int_float_consistency(self):
+        """
+        Test that the integer and float sample arrays read from a wav file agree with the interleaved integer samples.
+        """
+        url = './resources/Simple.wav'
+        reader = MakeAudioReader(url)
+        int_data = reader.ReadSamplesInt()
+        float_data = reader.ReadSamplesFloat()
+        interleaved = np.array(reader.ReadSamplesInterleavedInt())
+        self.assertEqual(int_data.shape, float_data.shape)
+        self.assertTrue(np.array_equal(int_data.T.ravel(), interleaved))
+        self.assertTrue(np.allclose(float_data, int_data/2.0**reader.fmt.bit_depth))
+
+
+    def test_wav_memmap_matches_wav_read(self):
+        """
+        Test that the memory mapped wav reader produces the same format, length and samples as the regular wav reader.
+        """
+        url = './resources/Simple.wav'
+        mapped = WavMemmapRead(url)
+        reader = WavRead(url)
+        self.assertEqual(mapped.fmt.n_channels, reader.fmt.n_channels)
+        self.assertEqual(mapped.fmt.samp_rate, reader.fmt.samp_rate)
+        self.assertEqual(mapped.fmt.bit_depth, reader.fmt.bit_depth)
+        self.assertAlmostEqual(mapped.audio_length, reader.audio_length)
+        self.assertTrue(np.array_equal(mapped.ReadSamplesInt(), reader.ReadSamplesInt()))
+        self.assertTrue(np.array_equal(mapped.ReadSamplesFloat(), reader.ReadSamplesFloat()))
+        self.assertIsInstance(MakeAudioReader(url), WavMemmapRead)
+
+    def test_wav_ranged_read(self):
+        """
+        Test that reading a window of a wav file returns the same samples as slicing the whole file.
+        """
+        url = './resources/Simple.wav'
+        for reader in (WavRead(url), WavMemmapRead(url)):
+            data = reader.ReadSamplesFloat()
+            samp_rate = reader.fmt.samp_rate
+            window = reader.ReadSamplesFloat(2.0, 1.0)
+            self.assertEqual(id(window), id(reader._data)) # Make sure the property is set correctly.
+            self.assertTrue(np.array_equal(window, data[:, 2*samp_rate:3*samp_rate]))
+            window = reader.ReadSamplesInt(8.0)
+            self.assertEqual(window.shape[1], data.shape[1] - 8*samp_rate)
+
+    def test_mp3_ranged_read(self):
+        """
+        Test that a window decoded directly from an mp3 file is the expected length.
+        """
+        url = './resources/Simple.mp3'
+        reader = MakeAudioReader(url)
+        window = reader.ReadSamplesFloat(2.0, 1.0)
+        self.assertEqual(id(window), id(reader._data)) # Make sure the property is set correctly.
+        self.assertEqual(window.shape, (reader.fmt.n_channels, reader.fmt.samp_rate))
+
+    def test_wav_stream_blocks(self):
+        """
+        Test that overlapping streamed blocks match the corresponding slices of the whole file.
+        """
+        url = './resources/Simple.wav'
+        block_frames = 4096
+        overlap_frames = 1024
+        hop_frames = block_frames - overlap_frames
+        for reader in (WavRead(url), WavMemmapRead(url)):
+            data = reader.ReadSamplesFloat()
+            num_blocks = 0
+            for block_num, block in enumerate(reader.StreamBlocks(block_frames, overlap_frames)):
+                start = block_num*hop_frames
+                self.assertTrue(np.array_equal(block, data[:, start:(start + block_frames)]))
+                num_blocks += 1
+            self.assertGreaterEqual((num_blocks - 1)*hop_frames + block_frames, data.shape[1])
+
+    def test_mp3_pipe_decode(self):
+        """
+        Test that decoding an mp3 via pipes gives the same samples as decoding via a temporary wav file.
+        """
+        url = './resources/Simple.mp3'
+        wav_data = Mp3Read(url).ReadSamplesInt()
+        for source in (url, open(url, 'rb')):
+            reader = Mp3Read(source, decode_mode=Mp3Read.DECODE_PIPE)
+            self.assertTrue(np.array_equal(reader.ReadSamplesInt(), wav_data))
+            self.assertIsNone(reader._temp_file) # Make sure nothing was written to disk.
+            block = next(reader.StreamBlocks(4096))
+            self.assertTrue(np.array_equal(block, wav_data[:, :4096]/2.0**reader.fmt.bit_depth))
+
+    def test_mp3_decode_cache(self):
+        """
+        Test that an mp3 is only decoded into the decode cache once, and that cached samples match a fresh decode.
+        """
+        url = './resources/Simple.mp3'
+        expected = Mp3Read(url).ReadSamplesInt()
+        with tempfile.TemporaryDirectory() as cache_dir:
+            cache = DecodeCache(cache_dir, max_bytes=2**30)
+            # Ranged reads of a file that is not cached only decode the range, so don't count as misses.
+            reader = MakeAudioReader(url, decode_cache=cache)
+            self.assertTrue(np.array_equal(reader.ReadSamplesInt(0.5, 0.5), Mp3Read(url).ReadSamplesInt(0.5, 0.5)))
+            self.assertEqual(cache.misses, 0)
+            for _ in range(2):
+                reader = MakeAudioReader(url, decode_cache=cache)
+                self.assertTrue(np.array_equal(reader.ReadSamplesInt(), expected))
+            self.assertEqual(cache.misses, 1)
+            self.assertEqual(cache.hits, 1)
+            self.assertGreater(cache.size_bytes, expected.nbytes)
+
+            # A cache too small for the file should still hold the file just decoded, until it is evicted.
+            small_cache = DecodeCache(cache_dir, max_bytes=1)
+            reader = Mp3Read(url, decode_mode=Mp3Read.DECODE_PIPE, decode_cache=small_cache)
+            self.assertTrue(np.array_equal(reader.ReadSamplesInt(), expected))
+            small_cache.Evict()
+            self.assertEqual(small_cache.evictions, 1)
+            self.assertEqual(small_cache.size_bytes, 0)
+
+    def test_batch_read(self):
+        """
+        Test that a batch read returns every file's samples in order, and captures errors for files that can't be read.
+        """
+        urls = ['./resources/Simple.wav', './resources/Simple.mp3', './resources/Missing.mp3']*3
+        expected = {url: MakeAudioReader(url).ReadSamplesFloat() for url in urls[:2]}
+        for use_processes in (False, True):
+            results = list(MakeAudioReaderBatch(urls, max_workers=2, use_processes=use_processes))
+            self.assertEqual([result.index for result in results], list(range(len(urls))))
+            for result in results:
+                if result.url in expected:
+                    self.assertIsNone(result.error)
+                    self.assertTrue(np.array_equal(result.result, expected[result.url]))
+                else:
+                    self.assertIsNone(result.result)
+                    self.assertIsNotNone(result.error)
+        results = list(MakeAudioReaderBatch(urls, read_samples=False, ordered=False))
+        self.assertEqual(sorted(result.index for result in results), list(range(len(urls))))
+
+        # Stopping early cancels the files not yet started.
+        batch = MakeAudioReaderBatch(urls, max_workers=1, max_pending=4)
+        self.assertTrue(np.array_equal(next(batch).result, expected[urls[0]]))
+        batch.close()
+        with self.assertRaises(ValueError):
+            next(MakeAudioReaderBatch(urls, max_pending=0))
+
+    def test_async_read(self):
+        """
+        Test that concurrent async reads return the same samples as blocking reads.
+        """
+        urls = ['./resources/Simple.mp3', './resources/Simple.wav']*4
+        expected = {url: MakeAudioReader(url).ReadSamplesFloat(2.0, 1.0) for url in urls[:2]}
+
+        async def read(url):
+            reader = await MakeAudioReaderAsync(url)
+            return await reader.ReadSamplesFloatAsync(2.0, 1.0)
+
+        async def read_all():
+            return await asyncio.gather(*[read(url) for url in urls])
+
+        for url, data in zip(urls, asyncio.run(read_all())):
+            self.assertTrue(np.array_equal(data, expected[url]))
+
+    def test_mp3_target_format(self):
+        """
+        Test that mp3 files may be decoded directly to a given sample rate, channel count and float sample format.
+        """
+        default = Mp3Read('./resources/Simple.mp3')
+        for decode_mode in (Mp3Read.DECODE_TEMP_WAV, Mp3Read.DECODE_PIPE):
+            this_file = Mp3Read('./resources/Simple.mp3', decode_mode=decode_mode, samp_rate=22050, n_channels=1,
+                                sample_fmt=Mp3Read.SAMPLE_FMT_F32)
+            data = this_file.ReadSamplesFloat()
+            self.assertEqual(this_file.fmt.samp_rate, 22050)
+            self.assertEqual(data.shape[0], 1)
+            self.assertEqual(data.dtype, np.float64)
+            self.assertTrue(np.all(np.abs(data) <= 0.5))
+            self.assertAlmostEqual(this_file.audio_length, default.audio_length, places=1)
+
+    def test_float32_read(self):
+        """
+        Test that reading samples in single precision matches the double precision samples, within float32 accuracy.
+        """
+        for reader in (WavRead('./resources/Simple.wav'),
+                       WavMemmapRead('./resources/Simple.wav'),
+                       Mp3Read('./resources/Simple.mp3')):
+            expected = reader.ReadSamplesFloat()
+            data = reader.ReadSamplesFloat(dtype=np.float32)
+            self.assertEqual(data.dtype, np.float32)
+            self.assertLessEqual(np.max(np.abs(data - expected)), np.finfo(np.float32).eps)
+            block = next(reader.StreamBlocks(4096, dtype=np.float32))
+            self.assertEqual(block.dtype, np.float32)
+            self.assertTrue(np.array_equal(block, data[:, :4096]))
 
 if __name__ == '__main__':
     unittest.main()
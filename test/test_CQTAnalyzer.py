@@ -0,0 +1,161 @@
+"""
+Created 10-17-26 by Matthew C. McCallum
+"""
+
+
+# Local imports
+from sigtools import WavRead
+from sigtools import CQTAnalyzer
+from sigtools import CQTBasisCache
+from sigtools import librosa_cqt_scipy_resample
+
+# Third party imports
+import numpy as np
+
+# Python standard library imports
+import unittest
+
+
+class TestCQTAnalyzer(unittest.TestCase):
+
+    def setUp(self):
+        """
+        Reads a simple test signal, used by most of the tests.
+        """
+        wav_reader = WavRead('./resources/Simple.wav')
+        self.signal = np.sum(wav_reader.ReadSamplesFloat(), axis=0)
+        self.samp_rate = wav_reader.fmt.samp_rate
+
+    def test_float32_precision(self):
+        """
+        Test that single precision analysis agrees with the default precision to within float32 accuracy, for each
+        type of CQT.
+        """
+        for cqt_type in (CQTAnalyzer.ACTUAL_CQT_TYPE, CQTAnalyzer.PSEUDO_CQT_TYPE, CQTAnalyzer.HYRBID_CQT_TYPE):
+            analyzer = CQTAnalyzer(12, 6, 40, 0.01, samp_rate=self.samp_rate, cqt_type=cqt_type)
+            expected = analyzer.Analyze(self.signal, 0)
+            analyzer = CQTAnalyzer(12, 6, 40, 0.01, samp_rate=self.samp_rate, cqt_type=cqt_type, dtype=np.float32)
+            result = analyzer.Analyze(self.signal, 0)
+            self.assertEqual(result.dtype, np.float32)
+            self.assertEqual(result.shape, expected.shape)
+            self.assertLess(np.max(np.abs(result - expected)), 1e-4*np.max(expected))
+
+    def test_basis_cache(self):
+        """
+        Test that CQT filter bases are built once and shared between analyzers of the same configuration, without
+        changing the analysis.
+        """
+        for cqt_type in (CQTAnalyzer.ACTUAL_CQT_TYPE, CQTAnalyzer.PSEUDO_CQT_TYPE, CQTAnalyzer.HYRBID_CQT_TYPE):
+            basis_cache = CQTBasisCache()
+            analyzer = CQTAnalyzer(12, 6, 40, 0.01, samp_rate=self.samp_rate, cqt_type=cqt_type,
+                                   basis_cache=basis_cache)
+            expected = analyzer.Analyze(self.signal, 0)
+            num_bases = basis_cache.misses
+            self.assertGreater(num_bases, 0)
+            self.assertEqual(basis_cache.num_entries, num_bases)
+            self.assertTrue(np.array_equal(analyzer.Analyze(self.signal, 0), expected))
+            self.assertEqual(basis_cache.hits + basis_cache.misses, num_bases) # The analyzer holds its own bases.
+
+            analyzer = CQTAnalyzer(12, 6, 40, 0.01, samp_rate=self.samp_rate, cqt_type=cqt_type,
+                                   basis_cache=basis_cache)
+            self.assertIs(analyzer.basis_cache, basis_cache)
+            self.assertTrue(np.array_equal(analyzer.Analyze(self.signal, 0), expected))
+            self.assertEqual(basis_cache.misses, num_bases)
+            self.assertEqual(basis_cache.hits, num_bases)
+
+        basis_cache = CQTBasisCache(max_entries=1)
+        for index in range(3):
+            basis_cache.Get(index, lambda: index)
+        self.assertEqual(basis_cache.num_entries, 1)
+        self.assertEqual(basis_cache.evictions, 2)
+
+    def test_stream(self):
+        """
+        Test that analyzing a signal in blocks of varying length gives the same CQT as analyzing it all at once.
+        """
+        analyzer = CQTAnalyzer(12, 6, 40, 0.01, samp_rate=self.samp_rate)
+        signal = self.signal[:-3] # Any length is analyzed.
+        expected = analyzer.Analyze(signal, 0)
+        block_ends = np.cumsum(np.random.RandomState(0).randint(0, 8192, len(signal)//2048))
+        blocks = np.split(signal, block_ends[block_ends < len(signal)])
+        result = np.hstack(list(analyzer.AnalyzeStream(iter(blocks))))
+        self.assertEqual(result.shape, expected.shape)
+        self.assertTrue(np.allclose(result, expected))
+        with self.assertRaises(ValueError):
+            next(CQTAnalyzer(12, 6, 40, 0.01, cqt_type=CQTAnalyzer.PSEUDO_CQT_TYPE).AnalyzeStream(iter(blocks)))
+
+    def test_parallel(self):
+        """
+        Test that computing the octaves of a CQT in parallel gives the same result as computing them serially.
+        """
+        for cqt_type in (CQTAnalyzer.ACTUAL_CQT_TYPE, CQTAnalyzer.HYRBID_CQT_TYPE):
+            expected = CQTAnalyzer(12, 6, 40, 0.01, samp_rate=self.samp_rate, cqt_type=cqt_type).Analyze(self.signal, 0)
+            for n_jobs in (2, -1):
+                analyzer = CQTAnalyzer(12, 6, 40, 0.01, samp_rate=self.samp_rate, cqt_type=cqt_type, n_jobs=n_jobs)
+                self.assertTrue(np.array_equal(analyzer.Analyze(self.signal, 0), expected))
+
+    def test_any_length(self):
+        """
+        Test that signals of any length are analyzed, including prime lengths, giving one window every hop.
+        """
+        analyzer = CQTAnalyzer(12, 6, 40, 0.01, samp_rate=self.samp_rate)
+        for num_samples in (44087, 44089, 44101):
+            result = analyzer.Analyze(self.signal[:num_samples], 0)
+            self.assertEqual(result.shape, (12*6, 1 + num_samples//analyzer.hop))
+            self.assertTrue(np.all(np.isfinite(result)))
+
+    def test_octave_downsampling(self):
+        """
+        Test that the half-band decimator downsampling each octave of the CQT passes tones below 85% of the new Nyquist
+        frequency to within 0.001dB, and attenuates tones above 115% of it by at least 85dB.
+        """
+        decimate = getattr(librosa_cqt_scipy_resample, '__halfband_decimate')
+        samples = np.arange(20001)
+        inner = slice(100, -100) # Away from the zero padding at either end.
+        for freq in np.linspace(0.0, 0.85*0.25, 20):
+            result = decimate(np.cos(2*np.pi*freq*samples + 0.3))
+            self.assertEqual(len(result), (len(samples) + 1)//2)
+            expected = np.sqrt(2)*np.cos(2*np.pi*freq*samples[::2] + 0.3) # Scaled as audio.resample(..., scale=True).
+            self.assertLess(np.max(np.abs(result - expected)[inner]), np.sqrt(2)*(10**(0.001/20) - 1))
+        for freq in np.linspace(1.15*0.25, 0.5, 20):
+            result = decimate(np.cos(2*np.pi*freq*samples + 0.3))
+            self.assertLess(np.max(np.abs(result)[inner]), np.sqrt(2)*10**(-85/20))
+        batch = np.random.RandomState(0).randn(3, 1001).astype(np.float32)
+        result = decimate(batch)
+        self.assertEqual(result.dtype, np.float32)
+        self.assertTrue(np.array_equal(result[1], decimate(batch[1])))
+
+    def test_windows(self):
+        """
+        Test that analyzing a range of windows gives exactly those windows of analyzing the whole signal, including at
+        the start and end of the signal.
+        """
+        for cqt_type in (CQTAnalyzer.ACTUAL_CQT_TYPE, CQTAnalyzer.PSEUDO_CQT_TYPE, CQTAnalyzer.HYRBID_CQT_TYPE):
+            analyzer = CQTAnalyzer(12, 6, 40, 0.01, samp_rate=self.samp_rate, cqt_type=cqt_type)
+            expected = analyzer.Analyze(self.signal, 0)
+            num_windows = expected.shape[1]
+            for start_idx, windows in ((0, 5), (3, 10), (num_windows//2, 1), (num_windows - 3, 10)):
+                result = analyzer.Analyze(self.signal, start_idx, num_windows=windows)
+                self.assertTrue(np.array_equal(result, expected[:, start_idx:(start_idx + windows)]))
+
+    def test_batch(self):
+        """
+        Test that analyzing a batch of clips at once gives the same CQT for each clip as analyzing it alone.
+        """
+        clips = np.stack((self.signal, self.signal[::-1], 0.5*np.roll(self.signal, 1000)))
+        for cqt_type in (CQTAnalyzer.ACTUAL_CQT_TYPE, CQTAnalyzer.PSEUDO_CQT_TYPE, CQTAnalyzer.HYRBID_CQT_TYPE):
+            analyzer = CQTAnalyzer(12, 6, 40, 0.01, samp_rate=self.samp_rate, cqt_type=cqt_type)
+            result = analyzer.Analyze(clips, 0)
+            self.assertEqual(result.ndim, 3)
+            self.assertEqual(len(result), len(clips))
+            for clip, clip_result in zip(clips, result):
+                expected = analyzer.Analyze(clip, 0)
+                self.assertEqual(clip_result.shape, expected.shape)
+                self.assertTrue(np.allclose(clip_result, expected))
+            result = analyzer.Analyze(clips, 10, num_windows=20)
+            self.assertEqual(result.shape, (len(clips), 12*6, 20))
+            self.assertTrue(np.allclose(result[1], analyzer.Analyze(clips[1], 10, num_windows=20)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -35,6 +35,39 @@ class TestCQTTimepointAnalyzer(unittest.TestCase):
         plt.imshow(np.log(result))
         plt.show()
 
+    def test_float32_precision(self):
+        """
+        Test that single precision analysis agrees with double precision to within float32 accuracy.
+        """
+        wav_reader = WavRead('./resources/Simple.wav')
+        signal = np.sum(wav_reader.ReadSamplesFloat(), axis=0)
+        samp_rate = wav_reader.fmt.samp_rate
+        times = np.linspace(0.0, 5.0, 200)
+        expected = CQTTimepointAnalyzer(samp_rate, 12, 8, 40).Analyze(signal, times)
+        result = CQTTimepointAnalyzer(samp_rate, 12, 8, 40, dtype=np.float32).Analyze(signal, times)
+        self.assertEqual(result.dtype, np.float32)
+        tolerance = 1e-4*np.max(expected)
+        self.assertLess(np.max(np.abs(result - expected)), tolerance)
+
+    def test_signal_edges(self):
+        """
+        Test that windows overlapping either end of the signal, or lying wholly beyond it, are analyzed as though the
+        signal were zero beyond its ends, for any number of time points.
+        """
+        samp_rate = 22050
+        signal = np.random.RandomState(0).uniform(-0.5, 0.5, 2*samp_rate)
+        padding = np.zeros(2*samp_rate)
+        padded_signal = np.concatenate((padding, signal, padding))
+        # Place each time point half way between samples so that both analyses round to the same sample.
+        times = np.concatenate(([-1.0, -0.1, 0.0, 1.0, 1.95, 2.0, 3.0], np.linspace(0.0, 2.0, 600))) + 0.5/samp_rate
+        analyzer = CQTTimepointAnalyzer(samp_rate, 12, 6, 60)
+        result = analyzer.Analyze(signal, times)
+        expected = analyzer.Analyze(padded_signal, times + len(padding)/samp_rate)
+        self.assertEqual(result.shape, (12*6, len(times)))
+        self.assertTrue(np.allclose(result, expected))
+        self.assertTrue(np.all(result[:, 0] == 0.0))
+        self.assertEqual(analyzer.Analyze(signal, []).shape, (12*6, 0))
+
 
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,262 @@
+"""
+Created 10-17-26 by Matthew C. McCallum
+"""
+
+
+# Local imports
+from sigtools import Spectrogram
+from sigtools import StreamingSpectrogram
+from sigtools import StreamingOverlapAdd
+from sigtools import FFTBackend
+from sigtools import NumpyFFTBackend
+from sigtools import SetFFTBackend
+from sigtools import GetFFTBackend
+
+# Third party imports
+import numpy as np
+
+# Python standard library imports
+import unittest
+
+
+class TestSpectrogram(unittest.TestCase):
+
+    def setUp(self):
+        """
+        A second of noise and a typical analysis configuration, used by most of the tests.
+        """
+        self.samp_rate = 44100
+        self.signal = np.random.RandomState(0).uniform(-0.5, 0.5, self.samp_rate)
+        self.window = np.hanning(1024)
+        self.fft_size = 2048
+        self.overlap = 0.75
+
+    def test_float32_precision(self):
+        """
+        Test that single precision analysis and synthesis agree with double precision to within float32 accuracy.
+        """
+        spec_64 = Spectrogram(self.window, self.fft_size, self.overlap)
+        spec_32 = Spectrogram(self.window, self.fft_size, self.overlap, dtype=np.float32)
+        spec_64.Analyze(self.signal)
+        spec_32.Analyze(self.signal)
+        self.assertEqual(spec_32.spec.dtype, np.complex64)
+        self.assertEqual(spec_32.spec.shape, spec_64.spec.shape)
+
+        # The FFT error grows with the log of its size, relative to the largest bin.
+        tolerance = 10*np.finfo(np.float32).eps*np.log2(self.fft_size)
+        self.assertLess(np.max(np.abs(spec_32.spec - spec_64.spec)), tolerance*np.max(np.abs(spec_64.spec)))
+
+        output_64 = spec_64.Synthesise()
+        output_32 = spec_32.Synthesise()
+        self.assertEqual(output_32.dtype, np.float32)
+        self.assertLess(np.max(np.abs(output_32 - output_64)), tolerance*np.max(np.abs(output_64)))
+
+    def test_one_sided(self):
+        """
+        Test that a one sided spectrogram holds the non-negative bins of the two sided spectrogram, synthesises the
+        same signal, and supports the same slicing and arithmetic.
+        """
+        two_sided = Spectrogram(self.window, self.fft_size, self.overlap)
+        one_sided = Spectrogram(self.window, self.fft_size, self.overlap, one_sided=True)
+        two_sided.Analyze(self.signal)
+        one_sided.Analyze(self.signal)
+        self.assertEqual(one_sided.spec.shape, (self.fft_size//2 + 1, len(two_sided)))
+        self.assertTrue(np.allclose(one_sided.spec, two_sided.spec[:one_sided.num_bins]))
+        self.assertTrue(np.allclose(one_sided.Synthesise(), two_sided.Synthesise()))
+
+        difference = one_sided[2:10] - one_sided[2:10]
+        self.assertEqual(len(difference), 8)
+        self.assertEqual(np.max(np.abs(difference.spec)), 0.0)
+        total = one_sided + one_sided
+        self.assertTrue(np.allclose(total.spec, 2*one_sided.spec))
+        one_sided[0:8] = difference
+        self.assertEqual(np.max(np.abs(one_sided.spec[:, :8])), 0.0)
+        with self.assertRaises(ValueError):
+            one_sided + two_sided
+
+    def test_synthesis_normalisation(self):
+        """
+        Test that a windowed, normalised overlap-add synthesis reconstructs the analyzed signal, wherever frames
+        overlap, including when the window length is not a multiple of the hop.
+        """
+        for win_len, overlap in ((1024, 0.75), (1000, 0.7)):
+            window = np.hanning(win_len)
+            spec = Spectrogram(window, self.fft_size, overlap, one_sided=True)
+            spec.Analyze(self.signal)
+            output = spec.Synthesise(window=window, normalise=True)[0]
+            end = (len(spec) - 1)*spec.frame_inc + win_len
+            inner = slice(win_len//4, end - win_len//4)
+            self.assertTrue(np.allclose(output[inner], self.signal[inner]))
+            self.assertTrue(np.all(output[end:] == 0.0))
+
+    def test_streaming(self):
+        """
+        Test that analyzing and synthesising a signal in chunks of varying length gives the same frames and output as
+        processing the whole signal at once.
+        """
+        window = np.hanning(1000)
+        spec = Spectrogram(window, self.fft_size, 0.7, one_sided=True)
+        spec.Analyze(self.signal)
+        expected = spec.Synthesise(window=window, normalise=True)[0]
+
+        analyzer = StreamingSpectrogram(window, self.fft_size, 0.7, one_sided=True)
+        synthesiser = StreamingOverlapAdd(window=window, normalise=True)
+        chunk_ends = np.cumsum(np.random.RandomState(1).randint(0, 2000, len(self.signal)//500))
+        chunks = np.split(self.signal, chunk_ends[chunk_ends < len(self.signal)])
+        frames = []
+        output = []
+        for chunk in chunks:
+            chunk_spec = analyzer.Analyze(chunk)
+            frames.append(chunk_spec.spec)
+            output.append(synthesiser.Synthesise(chunk_spec))
+        output.append(synthesiser.Flush())
+        output = np.concatenate(output)
+
+        self.assertEqual(analyzer.num_frames, len(spec))
+        self.assertTrue(np.allclose(np.hstack(frames), spec.spec))
+        self.assertEqual(len(output), (len(spec) - 1)*spec.frame_inc + len(window))
+        self.assertTrue(np.allclose(output, expected[:len(output)]))
+
+    def test_batch(self):
+        """
+        Test that analyzing a batch of signals together matches analyzing each on its own, and that slicing,
+        arithmetic and synthesis apply across the batch.
+        """
+        signals = np.stack([self.signal, -self.signal[::-1], 0.5*self.signal])
+        batch_spec = Spectrogram(self.window, self.fft_size, self.overlap, one_sided=True)
+        batch_spec.Analyze(signals)
+        self.assertEqual(batch_spec.spec.ndim, 3)
+        output = batch_spec.Synthesise()
+        self.assertEqual(output.shape[0], len(signals))
+        for index, signal in enumerate(signals):
+            spec = Spectrogram(self.window, self.fft_size, self.overlap, one_sided=True)
+            spec.Analyze(signal)
+            self.assertTrue(np.allclose(batch_spec.spec[index], spec.spec))
+            self.assertTrue(np.allclose(output[index], spec.Synthesise()[0]))
+            self.assertTrue(np.allclose((batch_spec[4:9] - spec[4:9]).spec[index], 0.0))
+
+        self.assertEqual(len(batch_spec[4:9]), 5)
+        batch_spec[0:2] = np.zeros(batch_spec.spec[..., 0:2].shape)
+        self.assertEqual(np.max(np.abs(batch_spec.spec[..., 0:2])), 0.0)
+
+        # Streaming synthesis keeps the batch shape and type, even when there is nothing left to flush.
+        analyzer = StreamingSpectrogram(self.window, self.fft_size, self.overlap, dtype=np.float32, one_sided=True)
+        synthesiser = StreamingOverlapAdd()
+        self.assertEqual(synthesiser.Synthesise(analyzer.Analyze(signals[:, :10])).shape, (len(signals), 0))
+        for flushed in (synthesiser.Flush(), synthesiser.Flush()):
+            self.assertEqual(flushed.shape, (len(signals), 0))
+            self.assertEqual(flushed.dtype, np.float32)
+
+    def test_fft_backend(self):
+        """
+        Test that every available FFT backend, whether set globally or per spectrogram, gives the same spectrogram and
+        synthesis as the default numpy backend, and keeps single precision.
+        """
+        expected = Spectrogram(self.window, self.fft_size, self.overlap)
+        expected.Analyze(self.signal)
+        for name in ('scipy', 'pyfftw'):
+            try:
+                backend = GetFFTBackend(name)
+            except ModuleNotFoundError:
+                continue
+            for dtype in (np.float64, np.float32):
+                spec = Spectrogram(self.window, self.fft_size, self.overlap, dtype=dtype, fft_backend=backend)
+                spec.Analyze(self.signal)
+                self.assertEqual(spec.spec.dtype, np.result_type(dtype, np.complex64))
+                self.assertTrue(np.allclose(spec.spec, expected.spec, atol=1e-3))
+                self.assertTrue(np.allclose(spec.Synthesise(), expected.Synthesise(), atol=1e-4))
+            SetFFTBackend(name)
+            try:
+                spec = Spectrogram(self.window, self.fft_size, self.overlap, one_sided=True)
+                spec.Analyze(self.signal)
+                self.assertTrue(np.allclose(spec.spec, expected.spec[:spec.num_bins]))
+            finally:
+                SetFFTBackend(NumpyFFTBackend())
+        with self.assertRaises(ValueError):
+            GetFFTBackend('fftpack')
+        self.assertIs(GetFFTBackend('numpy'), GetFFTBackend('numpy')) # Named backends, and their plans, are reused.
+
+        class IncompleteBackend(FFTBackend):
+            def Fft(self, x, n=None, axis=-1):
+                return np.fft.fft(x, n, axis)
+        with self.assertRaises(TypeError):
+            IncompleteBackend()
+
+    def test_in_place(self):
+        """
+        Test that in-place arithmetic, masking and analysis and synthesis into given buffers match their allocating
+        counterparts, and write into the same memory.
+        """
+        for one_sided in (False, True):
+            spec = Spectrogram(self.window, self.fft_size, self.overlap, one_sided=one_sided)
+            spec.Analyze(self.signal)
+            expected = spec.spec.copy()
+            buffer = spec.spec
+            spec.Analyze(-self.signal, out=buffer)
+            self.assertTrue(np.shares_memory(spec.spec, buffer))
+            self.assertTrue(np.allclose(spec.spec, -expected))
+            with self.assertRaises(ValueError):
+                spec.Analyze(self.signal[:-self.samp_rate//2], out=buffer)
+
+            other = Spectrogram(self.window, self.fft_size, self.overlap, one_sided=one_sided)
+            other.Analyze(self.signal)
+            spec += other
+            self.assertTrue(np.shares_memory(spec.spec, buffer))
+            self.assertTrue(np.allclose(spec.spec, 0.0))
+            spec -= other
+            self.assertTrue(np.allclose(spec.spec, -expected))
+
+            mask = np.random.RandomState(1).uniform(0.0, 1.0, other.spec.shape)
+            masked = other*mask
+            self.assertTrue(np.allclose(masked.spec, expected*mask))
+            other.ApplyMask(mask, out=spec)
+            self.assertTrue(np.shares_memory(spec.spec, buffer))
+            self.assertTrue(np.allclose(spec.spec, masked.spec))
+            other[2:10] *= 0.0
+            self.assertEqual(np.max(np.abs(other.spec[:, 2:10])), 0.0)
+
+            output = spec.Synthesise(window=self.window, normalise=True)
+            output_buffer = np.ones_like(output)
+            self.assertIs(spec.Synthesise(window=self.window, normalise=True, out=output_buffer), output_buffer)
+            self.assertTrue(np.array_equal(output_buffer, output))
+
+    def test_storage(self):
+        """
+        Test that each compact storage mode holds the spectrogram in less memory, and converts back to the complex
+        spectrogram, or its magnitude, to within the precision of that mode.
+        """
+        expected = Spectrogram(self.window, self.fft_size, self.overlap, one_sided=True)
+        expected.Analyze(self.signal)
+        magnitude = np.abs(expected.spec)
+        phase_error = np.pi/np.iinfo(np.int16).max
+        for storage, itemsize, tolerance in ((Spectrogram.MAGNITUDE_STORAGE, 4, 1e-6),
+                                             (Spectrogram.LOG_MAGNITUDE_STORAGE, 2, 1e-2),
+                                             (Spectrogram.MAGNITUDE_PHASE_STORAGE, 6, phase_error)):
+            spec = Spectrogram(self.window, self.fft_size, self.overlap, one_sided=True, storage=storage)
+            spec.Analyze(self.signal)
+            self.assertEqual(spec.storage, storage)
+            self.assertEqual(spec.data.itemsize, itemsize)
+            self.assertEqual(spec.spec.dtype, np.complex128)
+            self.assertEqual(spec.spec.shape, expected.spec.shape)
+            self.assertTrue(np.allclose(spec.magnitude, magnitude, rtol=tolerance, atol=tolerance))
+
+            # Slices and arithmetic keep the storage mode.
+            total = spec[2:10] + expected[2:10]
+            self.assertEqual(total.storage, storage)
+            self.assertEqual(len(total), 8)
+            spec[0:2] = expected[0:2]
+            self.assertTrue(np.allclose(spec.magnitude[:, :2], magnitude[:, :2], rtol=tolerance, atol=tolerance))
+
+        spec = Spectrogram(self.window, self.fft_size, self.overlap, one_sided=True,
+                           storage=Spectrogram.MAGNITUDE_PHASE_STORAGE)
+        spec.Analyze(self.signal)
+        self.assertLess(np.max(np.abs(spec.spec - expected.spec)), 2*phase_error*np.max(magnitude))
+        inner = slice(len(self.window), len(self.signal) - len(self.window))
+        output = spec.Synthesise(window=self.window, normalise=True)[0]
+        self.assertLess(np.max(np.abs(output[inner] - self.signal[inner])), 1e-3)
+        with self.assertRaises(ValueError):
+            Spectrogram(self.window, self.fft_size, self.overlap, storage='float16')
+
+
+if __name__ == '__main__':
+    unittest.main()
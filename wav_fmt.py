@@ -9,9 +9,10 @@ Created 01-07-17 by Matthew C. McCallum
 # None.
 
 # Thirdparty modules
-# None.
+import numpy as np
 
 # Python library imports
+import struct
 import wave
 
 class WavFmt( object ):
@@ -19,7 +20,10 @@ class WavFmt( object ):
     An object for encapsulating audio parameters for when reading from file, writing to file, playback etc..
     """
 
-    def __init__( self, samp_rate, n_channels, bit_depth ):
+    WAVE_FORMAT_PCM = 0x0001
+    WAVE_FORMAT_IEEE_FLOAT = 0x0003
+
+    def __init__( self, samp_rate, n_channels, bit_depth, is_float=False ):
         """
         Constructor.
 
@@ -29,10 +33,13 @@ class WavFmt( object ):
             n_channels -> int - The number of audio channels.
 
             bit_depth -> int - The number of bits describing each sample.
+
+            is_float -> bool - Whether samples are stored as IEEE floats rather than integers.
         """
         self.samp_rate = samp_rate
         self.n_channels = n_channels
         self.bit_depth = bit_depth
+        self.is_float = is_float
 
     @classmethod
     def FromWav( cls, wav_file ):
@@ -84,3 +91,76 @@ class WavFmt( object ):
         else:
             raise Exception('Unsupporeted bit depth format for packing data.')
         return unpack_fmt
+
+    def SampleDtype( self ):
+        """
+        Get the numpy data type of a single PCM sample for the current audio format, as it is stored in a wav file,
+        i.e., little endian.
+
+        Return:
+            str - The numpy dtype string that may be used with np.frombuffer, np.memmap, etc., to interpret raw sample
+            data for the current audio format described in this object.
+        """
+        if self.is_float:
+            if self.bit_depth == 32:
+                return '<f4'
+            elif self.bit_depth == 64:
+                return '<f8'
+            raise Exception('Unsupporeted bit depth format for packing data.')
+        if self.bit_depth == 16:
+            return '<i2'
+        elif self.bit_depth == 32:
+            return '<i4'
+        else:
+            raise Exception('Unsupporeted bit depth format for packing data.')
+
+    def IntToFloat( self, samples, out=None, dtype=np.float64 ):
+        """
+        Convert PCM samples in the current audio format to floats in a single scaling pass. Float PCM samples are
+        scaled so that their full scale matches that of integer samples, so that the same audio reads the same
+        regardless of how it is stored.
+
+        Args:
+            samples -> np.ndarray - An array of PCM samples of any shape, e.g., a (num_channels, num_frames) view on raw
+            wav data.
+
+            out -> np.ndarray - An optional preallocated float array of the same shape as samples to write the result
+            into. If None, a new C-contiguous array is allocated.
+
+            dtype -> np.dtype - The floating point type of the array allocated when out is None.
+
+        Return:
+            np.ndarray - The float array containing the converted samples.
+        """
+        if out is None:
+            out = np.empty( samples.shape, dtype=dtype )
+        # NOTE: Integer samples are scaled by 2**bit_depth, putting integer full scale, 2**(bit_depth - 1), at 0.5.
+        scale = 0.5 if self.is_float else 1.0/( 2.0**self.bit_depth )
+        np.multiply( samples, scale, out=out )
+        return out
+
+    def WavHeader( self, num_frames ):
+        """
+        Get a canonical wav file header, for writing a given number of frames in the current audio format to file
+        directly after it.
+
+        Args:
+            num_frames -> int - The number of frames that will follow the header.
+
+        Return:
+            bytes - The RIFF, fmt and data chunk headers.
+        """
+        data_length = num_frames*self.frame_bytes
+        format_tag = self.WAVE_FORMAT_IEEE_FLOAT if self.is_float else self.WAVE_FORMAT_PCM
+        return struct.pack( '<4sI4s4sIHHIIHH4sI',
+                            b'RIFF', 36 + data_length, b'WAVE',
+                            b'fmt ', 16, format_tag, self.n_channels, self.samp_rate,
+                            self.samp_rate*self.frame_bytes, self.frame_bytes, self.bit_depth,
+                            b'data', data_length )
+
+    @property
+    def frame_bytes( self ):
+        """
+        int - The number of bytes occupied by a single frame, i.e., one sample for every channel.
+        """
+        return self.n_channels*self.bit_depth//8
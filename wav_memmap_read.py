@@ -0,0 +1,231 @@
+"""
+Created 10-17-26 by Matthew C. McCallum
+"""
+
+# Local modules
+from .wav_fmt import *
+from .audio_read import *
+
+# Local submodules
+# None.
+
+# Thirdparty modules
+import numpy as np
+
+# Python library imports
+import struct
+import os
+
+
+class WavMemmapRead(AudioRead):
+    """
+    A wave reader object that memory maps the sample data of a wav file on local disk, rather than reading it into
+    memory. The RIFF header is parsed once on construction, after which samples are exposed as a lazy
+    (num_channels, num_frames) view, so that only the pages of the file that are actually indexed are ever read.
+    """
+    SAMPLE_FMT_NONE = 'None'
+    SAMPLE_FMT_INT_INTERLEAVED = 'Interleaved Integers'
+    SAMPLE_FMT_INT_ARRAY = 'Integer 2D Array'
+    SAMPLE_FMT_FLOAT_ARRAY = 'Float 2D Array'
+
+    WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+
+    def __init__( self, filename ):
+        """
+        Constructor.
+
+        Args:
+            filename -> str - The filename and path of the wav file on local disk to be read.
+        """
+        self._file = filename
+        self._data = None
+        self._data_fmt = self.SAMPLE_FMT_NONE
+
+        self._fmt, data_offset, data_length = self._ParseHeader( self._file )
+        self._num_frames = data_length//self._fmt.frame_bytes
+
+        # NOTE: np.memmap refuses to map zero bytes, so an empty data chunk just gets an empty array.
+        if self._num_frames:
+            frames = np.memmap( self._file,
+                                dtype=self._fmt.SampleDtype(),
+                                mode='r',
+                                offset=data_offset,
+                                shape=( self._num_frames, self._fmt.n_channels ) )
+        else:
+            frames = np.zeros( ( 0, self._fmt.n_channels ), dtype=self._fmt.SampleDtype() )
+        self._samples = frames.T
+
+    @staticmethod
+    def _ParseHeader( filename ):
+        """
+        Walks the RIFF chunks at the start of a wav file to find the audio format and the location of the sample data.
+
+        Args:
+            filename -> str - The filename and path of the wav file to parse.
+
+        Return:
+            WavFmt - The audio format described in the 'fmt ' chunk.
+
+            int - The byte offset of the start of the sample data in the file.
+
+            int - The number of bytes of sample data in the file.
+        """
+        file_length = os.path.getsize( filename )
+        fmt = None
+        with open( filename, 'rb' ) as audio:
+            riff, _, wave_id = struct.unpack( '<4sI4s', audio.read( 12 ) )
+            if riff != b'RIFF' or wave_id != b'WAVE':
+                raise ValueError( 'File is not a RIFF WAVE file: ' + filename )
+            while True:
+                chunk_header = audio.read( 8 )
+                if len( chunk_header ) < 8:
+                    raise ValueError( 'No data chunk found in wav file: ' + filename )
+                chunk_id, chunk_length = struct.unpack( '<4sI', chunk_header )
+                if chunk_id == b'fmt ':
+                    format_tag, n_channels, samp_rate, _, _, bit_depth = struct.unpack( '<HHIIHH', audio.read( 16 ) )
+                    read_length = 16
+                    if format_tag == WavMemmapRead.WAVE_FORMAT_EXTENSIBLE and chunk_length >= 40:
+                        # The actual format is the first two bytes of the sub-format GUID in the extension.
+                        format_tag, = struct.unpack( '<8xH14x', audio.read( 24 ) )
+                        read_length += 24
+                    if format_tag not in ( WavFmt.WAVE_FORMAT_PCM, WavFmt.WAVE_FORMAT_IEEE_FLOAT ):
+                        raise ValueError( 'Only PCM or IEEE float wav files may be memory mapped: ' + filename )
+                    is_float = format_tag == WavFmt.WAVE_FORMAT_IEEE_FLOAT
+                    fmt = WavFmt( samp_rate, n_channels, bit_depth, is_float=is_float )
+                    audio.seek( chunk_length - read_length + chunk_length%2, 1 )
+                elif chunk_id == b'data':
+                    if fmt is None:
+                        raise ValueError( 'Data chunk found before fmt chunk in wav file: ' + filename )
+                    data_offset = audio.tell()
+                    # Streamed writers (e.g., ffmpeg to a pipe) may leave a placeholder data length, so never trust
+                    # it beyond the end of the file.
+                    data_length = min( chunk_length, file_length - data_offset )
+                    return fmt, data_offset, data_length
+                else:
+                    audio.seek( chunk_length + chunk_length%2, 1 )
+
+    def ReadSamplesInterleavedInt( self ):
+        """
+        Reads all samples from the wav file as integers in an interleaved list.
+        This replaces any previous data read from the wav file.
+
+        Return:
+            list(int) - A list of interleaved samples from the audio file.
+        """
+        self._data_fmt = self.SAMPLE_FMT_INT_INTERLEAVED
+        self._data = self._samples.T.ravel().tolist()
+
+        return self._data
+
+    def ReadSamplesInt( self, start_seconds=0.0, duration=None ):
+        """
+        Gets samples from the wav file as integers, exactly as they are stored in the file.
+        This replaces any previous data read from the wav file.
+
+        Args:
+            start_seconds -> float - The time in seconds of the first sample to read.
+
+            duration -> float - The number of seconds of audio to read. If None, all samples up until the end of the
+            file are read.
+
+        Return:
+            np.ndarray - A read-only array of dimensions (num_channels, num_frames) containing the integer audio
+            samples. This is a lazy view on the memory mapped file, nothing is read from disk until it is indexed.
+        """
+        start_frame, end_frame = self._FrameRange( start_seconds, duration, self._num_frames )
+        self._data_fmt = self.SAMPLE_FMT_INT_ARRAY
+        self._data = self._samples[:,start_frame:end_frame]
+
+        return self._data
+
+    def ReadSamplesFloat( self, start_seconds=0.0, duration=None, dtype=np.float64 ):
+        """
+        Reads samples from the wav file as floats in the range -1.0 <= sample <= 1.0. Only the pages of the file
+        covering the requested range are read from disk.
+        This replaces any previous data read from the wav file.
+
+        Args:
+            start_seconds -> float - The time in seconds of the first sample to read.
+
+            duration -> float - The number of seconds of audio to read. If None, all samples up until the end of the
+            file are read.
+
+            dtype -> np.dtype - The floating point type of the returned samples, e.g., np.float32 to halve memory use.
+
+        Return:
+            np.ndarray - An array of dimensions (num_channels, num_frames) containing float valued audio samples.
+        """
+        start_frame, end_frame = self._FrameRange( start_seconds, duration, self._num_frames )
+        self._data_fmt = self.SAMPLE_FMT_FLOAT_ARRAY
+        self._data = self._fmt.IntToFloat( self._samples[:,start_frame:end_frame], dtype=dtype )
+
+        return self._data
+
+    def StreamBlocks( self, block_frames, overlap_frames=0, dtype=np.float64 ):
+        """
+        A generator that reads the wav file sequentially in blocks of float samples, so that long files may be
+        processed with bounded memory. This does not change the data property.
+
+        Args:
+            block_frames -> int - The number of frames in each block.
+
+            overlap_frames -> int - The number of frames shared between the end of each block and the start of the
+            next. Must be less than block_frames.
+
+            dtype -> np.dtype - The floating point type of the yielded blocks.
+
+        Return:
+            np.ndarray - Yields arrays of dimensions (num_channels, block_frames) containing float valued audio
+            samples, each starting block_frames - overlap_frames after the last. The final block may be shorter.
+            Note: the same buffer is reused for every block, so copy anything that is needed beyond the next
+            iteration.
+        """
+        yield from self._StreamArray( self._samples, block_frames, overlap_frames, dtype )
+
+    @property
+    def samples( self ):
+        """
+        np.ndarray - A lazy, read-only (num_channels, num_frames) integer view on the memory mapped sample data. Slicing
+        this along the frame axis only touches the pages of the file covering those frames.
+        """
+        return self._samples
+
+    @property
+    def fmt( self ):
+        """
+        Get the audio format object describing the file audio parameters, e.g., bit-depth, number channels, etc..
+
+        Return:
+            WavFmt - An object containing the audio format parameters.
+        """
+        return self._fmt
+
+    @property
+    def data( self ):
+        """
+        Any data that has been previously read in form the wave file.
+
+        Return:
+            ? - Audio sample data in the format that was most recently read from file.
+        """
+        return self._data
+
+    @property
+    def data_fmt( self ):
+        """
+        The current audio sample format of the data.
+
+        Return:
+            str - A string constant describing the format in which the class's data is in.
+        """
+        return self._data_fmt
+
+    @property
+    def audio_length( self ):
+        """
+        The length of the audio in the file in seconds.
+
+        Return:
+            float - The duration of the audio file in seconds.
+        """
+        return self._num_frames/self._fmt.samp_rate
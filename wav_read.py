@@ -14,7 +14,6 @@ import numpy as np
 
 # Python library imports
 import wave
-import struct
 
 
 class WavRead(AudioRead):
@@ -23,6 +22,7 @@ class WavRead(AudioRead):
     """
     SAMPLE_FMT_NONE = 'None'
     SAMPLE_FMT_INT_INTERLEAVED = 'Interleaved Integers'
+    SAMPLE_FMT_INT_ARRAY = 'Integer 2D Array'
     SAMPLE_FMT_FLOAT_ARRAY = 'Float 2D Array'
 
     def __init__( self, filehandle ):
@@ -44,41 +44,126 @@ class WavRead(AudioRead):
         if type(self._file) is not str:
             self._file.seek(0)
 
-    def ReadSamplesInterleavedInt( self ):
+    def _ReadFrames( self, start_frame=0, end_frame=None ):
         """
-        Reads all samples from the wav file as integers in an interleaved list.
-        This replaces any previous data read from the wav file.
+        Reads the raw PCM data for a range of frames in the wav file and interprets it as integer samples.
+
+        Args:
+            start_frame -> int - The index of the first frame to read.
+
+            end_frame -> int - One past the index of the last frame to read. If None, frames are read until the end
+            of the file.
 
         Return:
-            list(int) - A list of interleaved samples from the audio file.
+            np.ndarray - A read-only (num_channels, num_frames) integer view directly on the raw bytes read from file.
         """
+        if end_frame is None:
+            end_frame = self._num_frames
         with wave.open( self._file, 'rb' ) as audio:
-            data = audio.readframes( self._num_frames )
+            audio.setpos( start_frame )
+            data = audio.readframes( end_frame - start_frame )
         if type(self._file) is not str:
             self._file.seek(0)
-        data = struct.unpack( self._fmt.PackingString( self._num_frames ), data )
+        return self._FramesFromBytes( data )
+
+    def _FramesFromBytes( self, data ):
+        """
+        Interprets raw PCM data as integer samples without copying it.
 
+        Args:
+            data -> bytes - Interleaved PCM data, as returned by wave.Wave_read.readframes(...).
+
+        Return:
+            np.ndarray - A read-only (num_channels, num_frames) integer view on data.
+        """
+        data = np.frombuffer( data, dtype=self._fmt.SampleDtype() )
+        return data.reshape( ( -1, self._fmt.n_channels ) ).T
+
+    def StreamBlocks( self, block_frames, overlap_frames=0, dtype=np.float64 ):
+        """
+        A generator that reads the wav file sequentially in blocks of float samples, so that long files may be
+        processed with bounded memory. This does not change the data property.
+
+        Args:
+            block_frames -> int - The number of frames in each block.
+
+            overlap_frames -> int - The number of frames shared between the end of each block and the start of the
+            next. Must be less than block_frames.
+
+            dtype -> np.dtype - The floating point type of the yielded blocks.
+
+        Return:
+            np.ndarray - Yields arrays of dimensions (num_channels, block_frames) containing float valued audio
+            samples, each starting block_frames - overlap_frames after the last. The final block may be shorter.
+            Note: the same buffer is reused for every block, so copy anything that is needed beyond the next
+            iteration.
+        """
+        try:
+            with wave.open( self._file, 'rb' ) as audio:
+                yield from self._StreamBlocks( lambda num_frames: self._FramesFromBytes( audio.readframes( num_frames ) ),
+                                               block_frames,
+                                               overlap_frames,
+                                               dtype )
+        finally:
+            # Rewind even if the caller stops iterating early, so the stream may be read again.
+            if type(self._file) is not str:
+                self._file.seek(0)
+
+    def ReadSamplesInterleavedInt( self ):
+        """
+        Reads all samples from the wav file as integers in an interleaved list.
+        This replaces any previous data read from the wav file.
+
+        Return:
+            list(int) - A list of interleaved samples from the audio file.
+        """
         self._data_fmt = self.SAMPLE_FMT_INT_INTERLEAVED
-        self._data = list(data)
+        self._data = self._ReadFrames().T.ravel().tolist()
 
         return self._data
 
-    def ReadSamplesFloat( self ):
+    def ReadSamplesInt( self, start_seconds=0.0, duration=None ):
         """
-        Reads all samples from the wav file as floats in the range -1.0 <= sample <= 1.0.
+        Reads samples from the wav file as integers, exactly as they are stored in the file. Only the requested
+        range of frames is read from file.
         This replaces any previous data read from the wav file.
 
+        Args:
+            start_seconds -> float - The time in seconds of the first sample to read.
+
+            duration -> float - The number of seconds of audio to read. If None, all samples up until the end of the
+            file are read.
+
         Return:
-            np.ndarray - An array of dimensions (num_channels, num_frames) containing float valued audio samples.
+            np.ndarray - A read-only array of dimensions (num_channels, num_frames) containing the integer audio
+            samples. This is a strided view on the raw file data, no conversion or de-interleaving copy is made.
         """
-        self.ReadSamplesInterleavedInt()
+        start_frame, end_frame = self._FrameRange( start_seconds, duration, self._num_frames )
+        self._data_fmt = self.SAMPLE_FMT_INT_ARRAY
+        self._data = self._ReadFrames( start_frame, end_frame )
 
-        return_array = np.zeros( ( self._fmt.n_channels, self._num_frames ) )
-        for channel in range( self._fmt.n_channels ):
-            return_array[channel,:] = np.array( self._data[channel::self._fmt.n_channels] )/( 2.0**self._fmt.bit_depth )
+        return self._data
+
+    def ReadSamplesFloat( self, start_seconds=0.0, duration=None, dtype=np.float64 ):
+        """
+        Reads samples from the wav file as floats in the range -1.0 <= sample <= 1.0. Only the requested range of
+        frames is read from file.
+        This replaces any previous data read from the wav file.
+
+        Args:
+            start_seconds -> float - The time in seconds of the first sample to read.
 
+            duration -> float - The number of seconds of audio to read. If None, all samples up until the end of the
+            file are read.
+
+            dtype -> np.dtype - The floating point type of the returned samples, e.g., np.float32 to halve memory use.
+
+        Return:
+            np.ndarray - An array of dimensions (num_channels, num_frames) containing float valued audio samples.
+        """
+        start_frame, end_frame = self._FrameRange( start_seconds, duration, self._num_frames )
         self._data_fmt = self.SAMPLE_FMT_FLOAT_ARRAY
-        self._data = return_array
+        self._data = self._fmt.IntToFloat( self._ReadFrames( start_frame, end_frame ), dtype=dtype )
 
         return self._data
 